@@ -1,153 +1,357 @@
 import pandas as pd 
-import matplotlib.pyplot as plt 
+from matplotlib.axes import Axes
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple, Union
 from sqlalchemy.engine import Connection
+from metrics import metrics
+from tags import normalize_tags
 
 class Analyzer:
     
-    """ A class to analyze and visualize data from a database. 
+    """ A class to analyze and visualize data from a database or from a Parquet archive. 
     Attributes: 
-        connection (Connection): An active SQLAlchemy database connection. """
+        connection (Connection): An active SQLAlchemy database connection. 
+        storage (Storage): Storage backend queried instead of the connection, if given. 
+        archive (ParquetArchive): Parquet archive read instead of the database, if given. """
     
-    def __init__(self, db_connection: Connection):
+    def __init__(self, db_connection: Optional[Connection] = None, archive: Optional['ParquetArchive'] = None,
+                 storage: Optional['Storage'] = None):
         """
-        Initializes the analyzer with a database connection.
+        Initializes the analyzer with a database connection or storage backend or, for offline analysis, an archive.
 
         Args:
-            db_connection (Connection): An active SQLAlchemy database connection.
+            db_connection (Connection, optional): An active SQLAlchemy database connection; queries use MySQL's %s markers.
+            archive (ParquetArchive, optional): Parquet archive read instead of the database.
+            storage (Storage, optional): Connected storage backend; queries use its dialect and aggregations.
         """
-        self.connection = db_connection
+        self.connection = db_connection if db_connection is not None else getattr(storage, 'conn', None)
+        self.storage = storage
+        self.archive = archive
+        self.placeholder = storage.placeholder if storage else '%s'  # Parameter marker of the SQL dialect
 
-    def fetch_data(self, table_name: str) -> pd.DataFrame:
+    @classmethod
+    def from_archive(cls, directory: str) -> 'Analyzer':
+        """
+        Creates an analyzer reading the Parquet archive in the given directory, without a database.
+
+        Args:
+            directory (str): Root directory of the archive.
+
+        Returns:
+            Analyzer: The offline analyzer.
+        """
+        from archive import ParquetArchive  # pyarrow is only needed for offline analysis
+        return cls(archive=ParquetArchive(directory))
+
+    def _window(self, since: Optional[datetime]) -> Tuple[str, list]:
+        """
+        Builds the WHERE clause restricting a query to articles published since a given time.
+
+        Args:
+            since (datetime, optional): Start of the time window; None means the whole table.
+
+        Returns:
+            tuple: The WHERE clause (or an empty string) and its parameters.
+        """
+        if since is None:
+            return '', []
+        return f' WHERE time >= {self.placeholder}', [since]
+
+    def _read_sql(self, query: str, params: Optional[list] = None, **kwargs) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Runs a query on the storage backend, or on the connection through pandas.
+
+        Args:
+            query (str): The query, with parameters marked by the placeholder of the dialect.
+            params (list, optional): The query parameters.
+            **kwargs: Further arguments of pandas.read_sql, e.g. chunksize, index_col or parse_dates.
+
+        Returns:
+            DataFrame: The result, or an iterator of DataFrames if chunksize is given.
+        """
+        if self.storage:
+            return self.storage.read_sql(query, params, **kwargs)
+        return pd.read_sql(query, self.connection, params=params or None, **kwargs)
+
+    def _has_table(self, table_name: str) -> bool:
+        """
+        Checks if a table exists, on the storage backend or through SQLAlchemy's inspector.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+        if self.storage:
+            return self.storage.table_exists(table_name)
+        from sqlalchemy import inspect
+        return inspect(self.connection).has_table(table_name)
+
+    @metrics.timed('analyzer_fetch_data')
+    def fetch_data(self, table_name: str, columns: Optional[List[str]] = None,
+                   since: Optional[datetime] = None, chunksize: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         Fetches data from the specified table into a pandas DataFrame.
 
         Args:
             table_name (str): The name of the table to query.
+            columns (list, optional): Columns to fetch; all columns if not given.
+            since (datetime, optional): Only fetch articles published at or after this time.
+            chunksize (int, optional): Stream the result as an iterator of DataFrames of this many rows.
 
         Returns:
-            DataFrame: The data retrieved from the table.
+            DataFrame: The data retrieved from the table, or an iterator of DataFrames if chunksize is given.
         """
-        query = f"SELECT * FROM {table_name}"  # Form the SQL query to select all data from the specified table
-        data = pd.read_sql(query, self.connection)  # Execute the SQL query and read the data into a DataFrame
+        if self.archive:
+            # Archive partitions are months; with chunksize they are streamed one at a time
+            return self.archive.iter_months(columns, since) if chunksize else self.archive.load(columns, since)
+
+        where, params = self._window(since)
+        # Form the SQL query selecting only the needed columns from the specified table
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}{where}"
+        data = self._read_sql(query, params, chunksize=chunksize)  # Execute the SQL query and read the data into a DataFrame
         return data  # Return the DataFrame containing the fetched data
 
-    def visualize_popularity(self, data: pd.DataFrame) -> None:
+    @metrics.timed('analyzer_top_articles')
+    def top_articles(self, table_name: str, limit: int = 20, since: Optional[datetime] = None) -> pd.DataFrame:
         """
-        Visualizes the popularity of articles by their view counts.
+        Fetches the most visited articles, letting the database sort and limit them.
+
+        Args:
+            table_name (str): The name of the table to query.
+            limit (int): Number of articles to fetch. Defaults to 20.
+            since (datetime, optional): Only consider articles published at or after this time.
+
+        Returns:
+            DataFrame: header, time and post_visits of the top articles, most visited first.
+        """
+        if self.archive:
+            return self.archive.load(['header', 'time', 'post_visits'], since).nlargest(limit, 'post_visits')
+
+        where, params = self._window(since)
+        query = f"SELECT header, time, post_visits FROM {table_name}{where} ORDER BY post_visits DESC LIMIT {self.placeholder}"
+        return self._read_sql(query, params + [limit], parse_dates=['time'])
+
+    @metrics.timed('analyzer_tag_aggregates')
+    def tag_aggregates(self, table_name: str, since: Optional[datetime] = None, chunksize: int = 10000) -> pd.DataFrame:
+        """
+        Counts articles and sums comments and visits per canonical tag.
+        Storage backends able to aggregate tags themselves (DuckDB vectorized, SQLite through its tag
+        index) do so. On MySQL the maintained {table_name}_tag_stats aggregates are read (or, for a time
+        window, the indexed {table_name}_tags table); databases without the tag tables are aggregated
+        by streaming only the tag, comment and visit columns in chunks.
+
+        Args:
+            table_name (str): The name of the table to query.
+            since (datetime, optional): Only consider articles published at or after this time.
+            chunksize (int): Number of rows aggregated at once by the fallback scan. Defaults to 10000.
+
+        Returns:
+            DataFrame: 'articles', 'post_comments' and 'post_visits' columns indexed by tag.
+        """
+        if self.storage and not self.archive:
+            aggregated = self.storage.tag_aggregates(table_name, since)
+            if aggregated is not None:
+                return aggregated
+
+        if since is None:
+            query = f"SELECT tag, articles, comments AS post_comments, visits AS post_visits FROM {table_name}_tag_stats"
+        else:
+            query = f"""
+            SELECT t.tag, COUNT(*) AS articles, SUM(n.post_comments) AS post_comments, SUM(n.post_visits) AS post_visits
+            FROM {table_name}_tags t JOIN {table_name} n ON n.post_id = t.post_id
+            WHERE n.time >= {self.placeholder}
+            GROUP BY t.tag
+            """
+        # Without the tag tables (not migrated yet) the news table is scanned instead
+        if not self.archive and self._has_table(f"{table_name}_tag_stats" if since is None else f"{table_name}_tags"):
+            return self._read_sql(query, None if since is None else [since], index_col='tag')
+
+        partials = []
+        for chunk in self.fetch_data(table_name, ['post_tags', 'post_comments', 'post_visits'], since, chunksize):
+            exploded = chunk.assign(tag=chunk['post_tags'].map(normalize_tags)).explode('tag').dropna(subset=['tag'])  # One row per tag
+            partials.append(exploded.groupby('tag').agg(articles=('tag', 'size'),
+                                                        post_comments=('post_comments', 'sum'),
+                                                        post_visits=('post_visits', 'sum')))
+
+        if not partials:
+            return pd.DataFrame({'articles': [], 'post_comments': [], 'post_visits': []}, index=pd.Index([], name='tag'))
+        return pd.concat(partials).groupby(level=0).sum()  # Combine the per-chunk aggregates
+
+    @metrics.timed('analyzer_deduplicate')
+    def deduplicate(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                    since: Optional[datetime] = None, threshold: float = 0.8) -> pd.DataFrame:
+        """
+        Drops near-duplicate articles, e.g. stories republished under a new post_id, keeping the
+        earliest published article of every cluster. Clusters are found through an LSH index over
+        the MinHash signatures, so no pair of articles is compared unless they share a bucket.
+        The result can be passed as data to the visualization methods.
+
+        Args:
+            data (DataFrame, optional): A DataFrame of articles with 'post_id', 'time' and either a
+                'signature' or a 'content' column. If not given, the articles are fetched.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+            threshold (float): Estimated content similarity from which articles are duplicates. Defaults to 0.8.
+
+        Returns:
+            DataFrame: The articles without their near-duplicates, oldest first.
+        """
+        from dedup import LSHIndex, minhash  # Only needed for de-duplication
+
+        if data is None:
+            # The archive keeps no signatures, they are computed from the content instead
+            text_column = 'content' if self.archive else 'signature'
+            data = self.fetch_data(table_name, ['post_id', 'header', 'time', 'post_visits', 'post_comments',
+                                                'post_tags', text_column], since)
+            data['time'] = pd.to_datetime(data['time'])
+
+        data = data.sort_values('time', kind='stable')  # Index the originals before their republications
+        if 'signature' in data.columns:
+            signatures = data['signature']
+            if 'content' in data.columns:
+                signatures = signatures.where(signatures.notna(), data['content'].map(minhash))  # Rows written before the column existed
+        else:
+            signatures = data['content'].map(minhash)
+
+        clusters = LSHIndex(threshold).clusters(zip(data['post_id'], signatures))
+        originals = data['post_id'].map(clusters) == data['post_id']
+        metrics.incr('analyzer_duplicates_dropped', int((~originals).sum()))
+        return data[originals]
+
+    def popularity_data(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                        since: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Prepares the input of the popularity chart.
 
         Args:
-            data (DataFrame): A DataFrame containing article data.
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the top articles are queried from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+
+        Returns:
+            DataFrame: The 20 most visited articles with a 'header_with_date' label column.
         """
-        # Keep only the top 20 entries sorted by 'post_visits'
-        top_data = data.sort_values('post_visits', ascending=False).head(20)
+        if data is None:
+            top_data = self.top_articles(table_name, 20, since)  # The database sorts and limits
+        else:
+            # Keep only the top 20 entries sorted by 'post_visits'
+            top_data = data.sort_values('post_visits', ascending=False).head(20)
 
         # Add a new column combining the title and the publication date
-        top_data['header_with_date'] = (
-            top_data['header'] + '\n' + '(' + top_data['time'].dt.strftime('%Y-%m-%d') + ')'
-        )
-        
-        # Create a larger figure for better readability
-        plt.figure(figsize=(15, 10))
-
-        # Create horizontal bars for better readability
-        bars = plt.barh(top_data['header_with_date'], top_data['post_visits'], color='skyblue')
-
-        # Reverse the order so the most popular article is at the top
-        plt.gca().invert_yaxis()
-
-        # Adding numerical view counts inside the bars 
-        for bar in bars: 
-            plt.text(bar.get_width() / 2, # Place text at the center of the bar 
-                     bar.get_y() + bar.get_height() / 2, # Center the text vertically 
-                     f'{int(bar.get_width())}', # Convert view counts to integers 
-                     va='center', # Vertical alignment 
-                     ha='center', # Horizontal alignment 
-                     fontsize=12, # Font size of the text
-                     color='black' # Black text for contrast
-            )
-
-        # Chart settings
-        plt.title('Top-20 Most Popular Articles', fontsize=16)  # Set the title of the chart with font size 16
-        plt.xlabel('View Counts', fontsize=12)  # Label for the x-axis with font size 12
-        plt.ylabel('Titles', fontsize=12)  # Label for the y-axis with font size 12
-        plt.tight_layout()  # Adjust subplots to fit into the figure area
-        plt.show()  # Display the chart
+        return top_data.assign(
+            header_with_date=top_data['header'] + '\n' + '(' + top_data['time'].dt.strftime('%Y-%m-%d') + ')'
+        )[['header_with_date', 'post_visits']]
 
-    def tags_analysis(self, data: pd.DataFrame) -> None:
+    def tag_frequency_data(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                           since: Optional[datetime] = None) -> pd.Series:
         """
-        Analyzes the frequency of tags and displays them on a bar chart.
+        Prepares the input of the tag frequency chart.
 
         Args:
-            data (DataFrame): A DataFrame containing article data.
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the tag counts are aggregated from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+
+        Returns:
+            Series: Number of articles of the 10 most frequent tags.
         """
-        # Split tags and count their frequency
-        tags = data['post_tags'].str.split(',').explode().value_counts()
+        if data is None:
+            tags = self.tag_aggregates(table_name, since)['articles'].sort_values(ascending=False)
+        else:
+            # Split tags and count their frequency
+            tags = data['post_tags'].map(normalize_tags).explode().value_counts()
 
         # Get the top 10 tags
-        top_tags = tags[:10]
-
-        # Create a bar chart
-        plt.figure(figsize=(15, 10)) # Set the size of the figure to 15x10 inches
-        bars = plt.bar(top_tags.index, top_tags.values, color='lightcoral') # Create vertical bars with light coral color
-
-        # Add text displaying the count on each bar
-        for bar in bars:
-            plt.text(
-                bar.get_x() + bar.get_width() / 2,  # Center of the bar on the X-axis
-                bar.get_height() / 2,  # Text height - center of the bar on the Y-axis
-                str(bar.get_height()),  # Text - number of mentions
-                ha='center',  # Horizontal alignment
-                va='center',  # Vertical alignment
-                fontsize=12, # Font size of the text
-                color='black',  # Black text color
-                fontweight='bold'  # Bold font for better readability
-            )
-
-        # Chart settings
-        plt.title('Tag Frequency', fontsize=16)  # Set the title of the chart with font size 16
-        plt.xlabel('Tags', fontsize=12)  # Label for the x-axis with font size 12
-        plt.ylabel('Number of Mentions', fontsize=12)  # Label for the y-axis with font size 12
-        plt.xticks(rotation=45, ha='right')  # Rotate the x-axis labels by 45 degrees and align them to the right
-        plt.tight_layout()  # Adjust subplots to fit into the figure area
-        plt.show()  # Display the chart
+        return tags[:10]
 
-    def analyze_comments_by_tags(self, data: pd.DataFrame) -> None:
+    def comments_by_tags_data(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                              since: Optional[datetime] = None) -> pd.Series:
         """
-        Analyzes the number of comments for each tag.
+        Prepares the input of the comments-by-tags chart.
 
         Args:
-            data (DataFrame): A DataFrame containing article data.
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the comment sums are aggregated from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+
+        Returns:
+            Series: Number of comments of the 10 most commented tags.
         """
-        # Split tags into separate rows and create a flattened table
-        exploded_tags = data.assign(tag=data['post_tags'].str.split(',')).explode('tag')
-        
-        # Group by tags and sum the comments
-        tag_comments = exploded_tags.groupby('tag')['post_comments'].sum().sort_values(ascending=False)
-        
+        if data is None:
+            tag_comments = self.tag_aggregates(table_name, since)['post_comments'].sort_values(ascending=False)
+        else:
+            # Split tags into separate rows and create a flattened table
+            exploded_tags = data.assign(tag=data['post_tags'].map(normalize_tags)).explode('tag')
+
+            # Group by tags and sum the comments
+            tag_comments = exploded_tags.groupby('tag')['post_comments'].sum().sort_values(ascending=False)
+
         # Keep only the top 10 tags
-        top_tags = tag_comments.head(10)
-        
-        # Create a horizontal bar chart
-        plt.figure(figsize=(12, 8)) # Set the size of the figure to 12x8 inches
-        bars = plt.barh(top_tags.index, top_tags.values, color='lightgreen') # Create horizontal bars with light green color
-        plt.gca().invert_yaxis()  # Reverse order so most popular tags are at the top
-        
-        # Adding numerical values of comments to the bar chart
-        for bar in bars:
-            plt.text(
-                bar.get_width() + 2, # Position the text just to the right of the end of the bar
-                bar.get_y() + bar.get_height() / 2, # Center the text vertically within the bar
-                f'{int(bar.get_width())}', # Convert view counts to integers
-                va='center', # Vertical alignment
-                fontsize=12 # Font size of the text
-            )
-        
-        plt.title('Number of Comments by Tags', fontsize=16)  # Set the chart title with font size 16
-        plt.xlabel('Number of Comments', fontsize=14)  # Label for the x-axis with font size 14
-        plt.ylabel('Tags', fontsize=14)  # Label for the y-axis with font size 14
-        plt.tight_layout()  # Adjust subplots to fit into the figure area
+        return tag_comments.head(10)
+
+    def _show(self, draw, aggregate, figsize) -> None:
+        """
+        Draws a chart on a new pyplot figure and displays it.
+
+        Args:
+            draw (callable): One of the draw_* functions of this module.
+            aggregate: The input of the chart.
+            figsize (tuple): Size of the figure in inches.
+        """
+        import matplotlib.pyplot as plt  # Only interactive display needs pyplot and its global state
+
+        fig, ax = plt.subplots(figsize=figsize)
+        draw(ax, aggregate)
+        fig.tight_layout()  # Adjust subplots to fit into the figure area
         plt.show()  # Display the chart
 
+    @metrics.timed('analyzer_visualize_popularity')
+    def visualize_popularity(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                             since: Optional[datetime] = None) -> None:
+        """
+        Visualizes the popularity of articles by their view counts.
+
+        Args:
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the top articles are queried from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+        """
+        self._show(draw_popularity, self.popularity_data(data, table_name, since), CHART_SIZES['popularity'])
+
+    @metrics.timed('analyzer_tags_analysis')
+    def tags_analysis(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                      since: Optional[datetime] = None) -> None:
+        """
+        Analyzes the frequency of tags and displays them on a bar chart.
+
+        Args:
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the tag counts are aggregated from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+        """
+        self._show(draw_tag_frequency, self.tag_frequency_data(data, table_name, since), CHART_SIZES['tag_frequency'])
+
+    @metrics.timed('analyzer_analyze_comments_by_tags')
+    def analyze_comments_by_tags(self, data: Optional[pd.DataFrame] = None, table_name: str = 'news',
+                                 since: Optional[datetime] = None) -> None:
+        """
+        Analyzes the number of comments for each tag.
+
+        Args:
+            data (DataFrame, optional): A DataFrame containing article data. If not given,
+                the comment sums are aggregated from the database.
+            table_name (str): The table queried when no data is given. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+        """
+        self._show(draw_comments_by_tags, self.comments_by_tags_data(data, table_name, since), CHART_SIZES['comments_by_tags'])
+
     def save_to_csv(self, data, filename='output.csv'):
         """
         Saves data to a CSV file.
@@ -157,3 +361,95 @@ class Analyzer:
         data.to_csv(filename, index=False) # Save the DataFrame to a CSV file without the index column
         print(f"Data saved to {filename}")
 
+
+
+CHART_SIZES = {'popularity': (15, 10), 'tag_frequency': (15, 10), 'comments_by_tags': (12, 8)}  # Figure sizes in inches
+
+
+def draw_popularity(ax: Axes, top_data: pd.DataFrame) -> None:
+    """
+    Draws the popularity chart on the given axes.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        top_data (DataFrame): Output of Analyzer.popularity_data.
+    """
+    # Create horizontal bars for better readability
+    bars = ax.barh(top_data['header_with_date'], top_data['post_visits'], color='skyblue')
+
+    # Reverse the order so the most popular article is at the top
+    ax.invert_yaxis()
+
+    # Adding numerical view counts inside the bars 
+    for bar in bars: 
+        ax.text(bar.get_width() / 2, # Place text at the center of the bar 
+                bar.get_y() + bar.get_height() / 2, # Center the text vertically 
+                f'{int(bar.get_width())}', # Convert view counts to integers 
+                va='center', # Vertical alignment 
+                ha='center', # Horizontal alignment 
+                fontsize=12, # Font size of the text
+                color='black' # Black text for contrast
+        )
+
+    # Chart settings
+    ax.set_title('Top-20 Most Popular Articles', fontsize=16)  # Set the title of the chart with font size 16
+    ax.set_xlabel('View Counts', fontsize=12)  # Label for the x-axis with font size 12
+    ax.set_ylabel('Titles', fontsize=12)  # Label for the y-axis with font size 12
+
+
+def draw_tag_frequency(ax: Axes, top_tags: pd.Series) -> None:
+    """
+    Draws the tag frequency chart on the given axes.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        top_tags (Series): Output of Analyzer.tag_frequency_data.
+    """
+    bars = ax.bar(top_tags.index, top_tags.values, color='lightcoral') # Create vertical bars with light coral color
+
+    # Add text displaying the count on each bar
+    for bar in bars:
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,  # Center of the bar on the X-axis
+            bar.get_height() / 2,  # Text height - center of the bar on the Y-axis
+            str(int(bar.get_height())),  # Text - number of mentions
+            ha='center',  # Horizontal alignment
+            va='center',  # Vertical alignment
+            fontsize=12, # Font size of the text
+            color='black',  # Black text color
+            fontweight='bold'  # Bold font for better readability
+        )
+
+    # Chart settings
+    ax.set_title('Tag Frequency', fontsize=16)  # Set the title of the chart with font size 16
+    ax.set_xlabel('Tags', fontsize=12)  # Label for the x-axis with font size 12
+    ax.set_ylabel('Number of Mentions', fontsize=12)  # Label for the y-axis with font size 12
+    ax.tick_params(axis='x', labelrotation=45)  # Rotate the x-axis labels by 45 degrees
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')  # Align the rotated labels to the right
+
+
+def draw_comments_by_tags(ax: Axes, top_tags: pd.Series) -> None:
+    """
+    Draws the comments-by-tags chart on the given axes.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        top_tags (Series): Output of Analyzer.comments_by_tags_data.
+    """
+    bars = ax.barh(top_tags.index, top_tags.values, color='lightgreen') # Create horizontal bars with light green color
+    ax.invert_yaxis()  # Reverse order so most popular tags are at the top
+    
+    # Adding numerical values of comments to the bar chart
+    for bar in bars:
+        ax.text(
+            bar.get_width() + 2, # Position the text just to the right of the end of the bar
+            bar.get_y() + bar.get_height() / 2, # Center the text vertically within the bar
+            f'{int(bar.get_width())}', # Convert view counts to integers
+            va='center', # Vertical alignment
+            fontsize=12 # Font size of the text
+        )
+    
+    ax.set_title('Number of Comments by Tags', fontsize=16)  # Set the chart title with font size 16
+    ax.set_xlabel('Number of Comments', fontsize=14)  # Label for the x-axis with font size 14
+    ax.set_ylabel('Tags', fontsize=14)  # Label for the y-axis with font size 14
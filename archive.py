@@ -0,0 +1,155 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import Iterator, List, Optional
+from metrics import metrics
+from tags import normalize_tags
+
+COLUMNS = ['post_id', 'header', 'content', 'time', 'post_visits', 'post_comments', 'post_tags']
+
+SCHEMA = pa.schema([
+    ('post_id', pa.string()),
+    ('header', pa.string()),
+    ('content', pa.string()),
+    ('time', pa.timestamp('s')),
+    ('post_visits', pa.int64()),
+    ('post_comments', pa.int64()),
+    ('post_tags', pa.string()),
+    ('tags', pa.list_(pa.string())),  # Canonical tags, dictionary-encoded in the files
+])
+
+
+class ParquetArchive:
+
+    """ A class keeping a columnar copy of the news table as Parquet files partitioned by month.
+    Every month lives in `<directory>/month=YYYY-MM/part-0.parquet`. Tags are stored both as the
+    original post_tags string and as a list of canonical tags; both are dictionary-encoded.
+    Attributes:
+        directory (str): Root directory of the archive. """
+
+    def __init__(self, directory: str = 'news_archive'):
+        """
+        Initializes the archive.
+
+        Args:
+            directory (str): Root directory of the archive. Defaults to 'news_archive'.
+        """
+        self.directory = directory
+
+    def months(self) -> List[str]:
+        """
+        Lists the archived months.
+
+        Returns:
+            list: 'YYYY-MM' names of the existing partitions, oldest first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(self.directory) if name.startswith('month='))
+
+    def _partition(self, month: str) -> str:
+        return os.path.join(self.directory, f"month={month}", 'part-0.parquet')
+
+    @metrics.timed('archive_export')
+    def export(self, storage, table_name: str = 'news', full: bool = False, chunksize: int = 20000) -> List[str]:
+        """
+        Writes the news table to the archive, streaming it month by month.
+        Incremental exports only rewrite the newest archived month, which may have been incomplete,
+        and append the months after it. Visit and comment counts of older months keep the values they
+        had when they were exported; pass full=True to refresh them.
+
+        Args:
+            storage (Storage): Connected storage backend holding the news table.
+            table_name (str): The name of the table to export. Defaults to 'news'.
+            full (bool): Rewrite every month instead of only the new ones. Defaults to False.
+            chunksize (int): Number of rows read per round-trip. Defaults to 20000.
+
+        Returns:
+            list: The months written.
+        """
+        months = self.months()
+        query = f"SELECT {', '.join(COLUMNS)} FROM {table_name}"
+        params = None
+        if months and not full:
+            query += f" WHERE time >= {storage.placeholder}"
+            params = [datetime.strptime(months[-1], '%Y-%m')]  # Start of the newest archived month
+        query += " ORDER BY time"
+
+        written = []
+        writer = None
+        month = None
+        try:
+            for chunk in storage.read_sql(query, params, chunksize=chunksize):
+                chunk['time'] = pd.to_datetime(chunk['time'])
+                chunk['tags'] = chunk['post_tags'].map(normalize_tags)
+                # Rows arrive ordered by time, so every month is written in one go
+                for chunk_month, rows in chunk.groupby(chunk['time'].dt.strftime('%Y-%m'), sort=True):
+                    if chunk_month != month:
+                        if writer:
+                            self._close(writer, month)
+                        month = chunk_month
+                        writer = self._open(month)
+                        written.append(month)
+                    writer.write_table(pa.Table.from_pandas(rows[SCHEMA.names], schema=SCHEMA, preserve_index=False))
+                    metrics.incr('archive_rows_written', len(rows))
+        finally:
+            if writer:
+                self._close(writer, month)
+
+        print(f"Archived {len(written)} months to {self.directory}.")
+        return written
+
+    def _open(self, month: str) -> pq.ParquetWriter:
+        path = self._partition(month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Dictionary-encode the repetitive tag columns; article texts are unique, so zstd alone is better
+        return pq.ParquetWriter(f"{path}.tmp", SCHEMA, compression='zstd',
+                                use_dictionary=['post_tags', 'tags.list.element'])
+
+    def _close(self, writer: pq.ParquetWriter, month: str) -> None:
+        writer.close()
+        path = self._partition(month)
+        os.replace(f"{path}.tmp", path)  # Readers never see a half-written partition
+
+    def iter_months(self, columns: Optional[List[str]] = None, since: Optional[datetime] = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the archive one month at a time through memory-mapped files.
+
+        Args:
+            columns (list, optional): Columns to read; all columns if not given.
+            since (datetime, optional): Only read articles published at or after this time.
+
+        Yields:
+            DataFrame: The articles of one month.
+        """
+        for month in self.months():
+            if since is not None and month < since.strftime('%Y-%m'):
+                continue  # The whole partition is older than the window
+            read_columns = None if columns is None else list(dict.fromkeys(columns + (['time'] if since else [])))
+            table = pq.read_table(self._partition(month), columns=read_columns, memory_map=True,
+                                  read_dictionary=['tags'] if columns is None or 'tags' in columns else None)
+            data = table.to_pandas()
+            if since is not None:
+                data = data[data['time'] >= since]
+                if columns is not None and 'time' not in columns:
+                    data = data.drop(columns='time')
+            yield data
+
+    @metrics.timed('archive_load')
+    def load(self, columns: Optional[List[str]] = None, since: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Reads the archive into one DataFrame.
+
+        Args:
+            columns (list, optional): Columns to read; all columns if not given.
+            since (datetime, optional): Only read articles published at or after this time.
+
+        Returns:
+            DataFrame: The archived articles.
+        """
+        frames = list(self.iter_months(columns, since))
+        if not frames:
+            return pd.DataFrame(columns=columns or SCHEMA.names)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,374 @@
+import io
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from statistics import median
+from time import sleep, perf_counter
+from datetime import datetime, timedelta
+from threading import Thread, Lock
+from contextlib import redirect_stdout
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from scraper import Scraper
+from http_client import HttpClient
+from parsers import PARSERS, get_parser
+from storage import SqliteStorage, DuckDbStorage
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) # Directory of the project modules
+TAGS = ['Арсенал', 'Челси', 'Ливерпуль', 'Манчестер Сити', 'Манчестер Юнайтед', 'Тоттенхэм', 'Трансферы', 'Травмы']
+
+
+class FixtureServer:
+
+    """ A class serving synthetic fapl.ru listing and article pages from a local HTTP server.
+    Listing pages live at /news/?skip=N with `per_page` 'block news' entries each, articles at
+    /news/<post_id>/. Articles are published one per `interval` going back from `newest`.
+    Attributes:
+        url (str): Root URL of the running server.
+        bytes_served (int): Total size of all response bodies sent. """
+
+    def __init__(self, articles=200, per_page=20, latency=0.0, paragraphs=8,
+                 newest=datetime(2024, 12, 1, 12, 0), interval=timedelta(hours=3)):
+
+        """ Initializes the server (not started yet).
+        Args:
+            articles (int): Number of articles on the site. Defaults to 200.
+            per_page (int): Articles per listing page. Defaults to 20.
+            latency (float): Seconds every response is delayed. Defaults to 0.
+            paragraphs (int): Paragraphs per article. Defaults to 8.
+            newest (datetime): Publication time of the newest article.
+            interval (timedelta): Time between two consecutive articles. """
+
+        self.articles = articles
+        self.per_page = per_page
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.newest = newest
+        self.interval = interval
+        self.bytes_served = 0
+        self.url = None
+        self._lock = Lock()
+        self._server = None
+
+    def post_time(self, index):
+        return self.newest - index * self.interval
+
+    def listing_page(self, skip):
+
+        """ Renders the listing page starting at offset `skip`. """
+
+        blocks = []
+        for index in range(skip, min(skip + self.per_page, self.articles)):
+            post_id = 100000 - index
+            blocks.append(f'<div class="block news"><h3><a href="/news/{post_id}/">Новость {post_id}</a></h3>'
+                          f'<p class="f-l">Автор</p>'
+                          f'<p class="f-r">{self.post_time(index):%d.%m.%Y %H:%M} ({index % 50})</p></div>')
+        return f'<html><body><div id="news">{"".join(blocks)}</div></body></html>'.encode('windows-1251')
+
+    def article_page(self, post_id):
+
+        """ Renders the article page of a post_id, or None if it does not exist. """
+
+        index = 100000 - post_id
+        if not 0 <= index < self.articles:
+            return None
+        tags = ', '.join(TAGS[(index + i) % len(TAGS)] for i in range(1 + index % 3))
+        content = ''.join(f'<p>Абзац {i} новости {post_id}. Текст новости об английской Премьер-лиге.\n\r\n</p>'
+                          for i in range(self.paragraphs))
+        return (f'<html><body><div class="block"><h2>Новость {post_id}</h2>'
+                f'<div class="content">{content}</div>'
+                f'<div class="info"><p class="tags">{tags}</p>'
+                f'<p class="visits f-l">Просмотров: {1000 + index * 7}</p>'
+                f'<p class="date f-r">{self.post_time(index):%d.%m.%Y %H:%M}</p></div></div></body></html>').encode('windows-1251')
+
+    def _handler(self):
+
+        """ Builds the request handler class bound to this server. """
+
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                body = None
+                if parts.path == '/news/':
+                    body = fixture.listing_page(int(parse_qs(parts.query).get('skip', ['0'])[0]))
+                elif parts.path.startswith('/news/') and parts.path.strip('/').split('/')[-1].isdigit():
+                    body = fixture.article_page(int(parts.path.strip('/').split('/')[-1]))
+
+                if fixture.latency:
+                    sleep(fixture.latency)
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=windows-1251')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with fixture._lock:
+                    fixture.bytes_served += len(body)
+
+            def log_message(self, format, *args):
+                pass # Keep the benchmark output clean
+
+        return Handler
+
+    def start(self):
+
+        """ Starts serving in a background thread.
+        Returns:
+            FixtureServer: The server itself, for chaining. """
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+
+        """ Stops the server. """
+
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def bench_scrape(server, workers):
+
+    """ Measures a full-mode crawl of the fixture server.
+    Returns:
+        tuple: (results dict, scraped articles dict). """
+
+    server.bytes_served = 0
+    client = HttpClient(pool_size=workers + 1, per_host=workers, rate=0)
+    scraper = Scraper([], 'full', workers=workers, client=client, cutoff=datetime(1970, 1, 1), base_url=server.url)
+
+    started = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        articles = scraper.scraper()
+    elapsed = perf_counter() - started
+    client.close()
+
+    return {'workers': workers,
+            'articles': len(articles),
+            'seconds': elapsed,
+            'articles_per_sec': len(articles) / elapsed,
+            'bytes_per_sec': server.bytes_served / elapsed}, articles
+
+
+def bench_parse(server, repeat):
+
+    """ Measures the parse time of a listing and an article page for every installed parser backend. """
+
+    listing = server.listing_page(0).decode('windows-1251')
+    article = server.article_page(100000).decode('windows-1251')
+    results = {}
+    for name in PARSERS:
+        with redirect_stdout(io.StringIO()):
+            parser = get_parser(name)
+        if parser.name != name:
+            continue # Backend not installed
+
+        started = perf_counter()
+        for _ in range(repeat):
+            parser.parse_listing(listing)
+        listing_time = (perf_counter() - started) / repeat
+
+        started = perf_counter()
+        for _ in range(repeat):
+            parser.parse_article(article)
+        article_time = (perf_counter() - started) / repeat
+
+        results[name] = {'listing_ms': listing_time * 1000, 'article_ms': article_time * 1000}
+    return results
+
+
+def embedded_storages():
+
+    """ Returns the in-memory storage backends that can run here, connected. """
+
+    storages = []
+    for backend in (SqliteStorage, DuckDbStorage):
+        db = backend(':memory:')
+        try:
+            db.connect_to_database()
+        except ImportError:
+            continue # DuckDB is not installed
+        storages.append(db)
+    return storages
+
+
+def bench_insert(db, articles, batch_size):
+
+    """ Measures batched upserts of the scraped articles into an embedded storage backend. """
+
+    db.create_table('news')
+    started = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        db.insert_data('news', articles, batch_size=batch_size)
+    db.commit()
+    elapsed = perf_counter() - started
+    return {'rows': len(articles), 'batch_size': batch_size, 'seconds': elapsed,
+            'rows_per_sec': len(articles) / elapsed if elapsed else None}
+
+
+def bench_analyzer(db):
+
+    """ Measures the Analyzer methods on an embedded storage backend, rendering off-screen. """
+
+    import matplotlib
+    matplotlib.use('Agg') # No display on benchmark hosts
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from analyzer import Analyzer
+
+    analyzer = Analyzer(storage=db)
+    results = {}
+
+    started = perf_counter()
+    analyzer.tag_aggregates('news')
+    results['tag_aggregates_ms'] = (perf_counter() - started) * 1000 # Aggregated inside the database
+
+    started = perf_counter()
+    data = analyzer.fetch_data('news')
+    data['time'] = pd.to_datetime(data['time'])
+    results['fetch_data_ms'] = (perf_counter() - started) * 1000
+
+    for method in ('visualize_popularity', 'tags_analysis', 'analyze_comments_by_tags'):
+        started = perf_counter()
+        getattr(analyzer, method)(data.copy())
+        results[f'{method}_ms'] = (perf_counter() - started) * 1000
+        plt.close('all')
+    return results
+
+
+# Imports the modules of a CLI subcommand in a fresh interpreter and reports the cost
+STARTUP_PROBE = """
+import sys, json
+from time import perf_counter
+started = perf_counter()
+import cli
+if sys.argv[1] != 'cli':
+    cli.load(sys.argv[1])
+elapsed = perf_counter() - started
+try:
+    # The peak of this interpreter alone; ru_maxrss would include the benchmark process it was forked from
+    with open('/proc/self/status') as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+except OSError:
+    rss = None # Not available outside Linux
+print(json.dumps({'import_seconds': elapsed, 'max_rss_mb': rss}))
+"""
+
+
+def bench_startup(repeat):
+
+    """ Measures the import time and peak memory of every CLI subcommand, each in a fresh interpreter.
+    'cli' is the argument parsing alone. Medians of `repeat` runs are reported. """
+
+    from cli import MODULES
+
+    results = {}
+    for command in ['cli'] + list(MODULES):
+        runs = []
+        for _ in range(repeat):
+            started = perf_counter()
+            # The probe imports the project modules, so it runs from their directory wherever the benchmark is started
+            output = subprocess.run([sys.executable, '-c', STARTUP_PROBE, command], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout
+            runs.append(dict(json.loads(output), process_seconds=perf_counter() - started))
+        results[command] = {key: median(run[key] for run in runs) if runs[0][key] is not None else None
+                            for key in runs[0]}
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+
+    """ Compares the startup results of a run with those of a previous run.
+    Returns:
+        list: Descriptions of the measurements more than `tolerance` (a fraction) worse than the baseline. """
+
+    regressions = []
+    for command, measured in results.get('startup', {}).items():
+        for key, value in measured.items():
+            previous = baseline.get('startup', {}).get(command, {}).get(key)
+            if value is not None and previous and value > previous * (1 + tolerance):
+                regressions.append(f"{command} {key}: {previous:.3f} -> {value:.3f}")
+    return regressions
+
+
+def git_revision():
+
+    """ Returns the current commit hash, or None outside a git checkout. """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(articles=200, latency=0.0, workers=8, repeat=50, batch_size=500, skip_analyzer=False, startup_repeat=5):
+
+    """ Runs the whole benchmark suite against a local fixture server.
+    Returns:
+        dict: Machine-readable results. """
+
+    server = FixtureServer(articles=articles, latency=latency).start()
+    try:
+        scrape, scraped = bench_scrape(server, workers)
+        parse = bench_parse(server, repeat)
+    finally:
+        server.stop()
+
+    storages = embedded_storages()
+    results = {'revision': git_revision(),
+               'timestamp': datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(),
+               'config': {'articles': articles, 'latency': latency, 'workers': workers, 'repeat': repeat},
+               'scrape': scrape,
+               'parse': parse,
+               'insert': {db.name: bench_insert(db, scraped, batch_size) for db in storages}}
+    if not skip_analyzer:
+        results['analyzer'] = {db.name: bench_analyzer(db) for db in storages}
+    for db in storages:
+        db.commit_and_close()
+    if startup_repeat:
+        results['startup'] = bench_startup(startup_repeat)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the scraper, DB writes and analyzer offline.')
+    parser.add_argument('--articles', type=int, default=200, help='Number of articles served by the fixture server.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every fixture response is delayed.')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent article downloads.')
+    parser.add_argument('--repeat', type=int, default=50, help='Repetitions of each parse measurement.')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per upsert batch.')
+    parser.add_argument('--skip-analyzer', action='store_true', help='Do not benchmark the Analyzer methods.')
+    parser.add_argument('--startup-repeat', type=int, default=5, help='Runs per subcommand startup measurement; 0 skips them.')
+    parser.add_argument('--baseline', default=None, help='Previous results; exit with an error if startup regressed.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed startup regression against the baseline.')
+    parser.add_argument('--output', default='benchmark_results.json', help='File the JSON results are written to.')
+    args = parser.parse_args()
+
+    results = run(args.articles, args.latency, args.workers, args.repeat, args.batch_size, args.skip_analyzer,
+                  args.startup_repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Startup regression: {regression}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,138 @@
+import os
+import json
+import zlib
+import hashlib
+from time import time
+from threading import Lock
+
+
+class CacheMissError(KeyError):
+
+    """ Raised in offline replay mode when a URL is not in the cache. """
+
+
+class ResponseCache:
+
+    """ A class storing raw HTTP responses on disk, keyed by URL.
+    Every entry is one zlib-compressed file named after the SHA-256 of its URL, holding a JSON
+    metadata line (URL, fetch time, encoding, validators) followed by the response body.
+    Entries older than `ttl` are stale; when the cache outgrows `max_bytes` the least recently
+    used entries (oldest modification time, refreshed on every hit) are evicted.
+    Attributes:
+        directory (str): Root directory of the cache.
+        ttl (float): Seconds an entry stays fresh, None for no expiry.
+        max_bytes (int): Size budget of the cache on disk. """
+
+    def __init__(self, directory='.http_cache', ttl=None, max_bytes=1 << 30):
+
+        """ Initializes the cache, creating its directory if needed.
+        Args:
+            directory (str): Root directory of the cache. Defaults to '.http_cache'.
+            ttl (float, optional): Seconds an entry stays fresh. Defaults to None (no expiry).
+            max_bytes (int): Size budget of the cache on disk. Defaults to 1 GiB. """
+
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._files()) # Current size on disk
+
+    def _files(self):
+
+        """ Yields the paths of all cache entries. """
+
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.bin'):
+                    yield os.path.join(root, name)
+
+    def _path(self, url):
+
+        """ Returns the file of the entry of a URL, sharded by the first two hex digits of its key. """
+
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.bin")
+
+    def get(self, url):
+
+        """ Reads the entry of a URL, marking it as recently used.
+        Args:
+            url (str): URL of the response.
+        Returns:
+            tuple: (body, meta) where body is bytes and meta a dictionary, or None if not cached. """
+
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                raw = zlib.decompress(f.read())
+            os.utime(path) # Refresh the LRU position
+        except (OSError, zlib.error):
+            return None
+
+        meta, body = raw.split(b'\n', 1)
+        meta = json.loads(meta)
+        if meta.get('url') != url:
+            return None # Hash collision
+        return body, meta
+
+    def is_fresh(self, meta):
+
+        """ Returns True if an entry is younger than the TTL. """
+
+        return self.ttl is None or time() - meta['fetched_at'] < self.ttl
+
+    def put(self, url, body, meta):
+
+        """ Stores a response, evicting old entries if the cache grows over its budget.
+        Args:
+            url (str): URL of the response.
+            body (bytes): Raw response body.
+            meta (dict): JSON-serializable metadata (encoding, validators, ...). """
+
+        meta = dict(meta, url=url, fetched_at=time())
+        data = zlib.compress(json.dumps(meta).encode('utf-8') + b'\n' + body)
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path) # Readers never see a half-written entry
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def touch(self, url):
+
+        """ Marks a stale entry as fresh again, e.g. after a 304 Not Modified. """
+
+        entry = self.get(url)
+        if entry:
+            body, meta = entry
+            self.put(url, body, meta)
+
+    def _evict(self):
+
+        """ Removes least recently used entries until the cache uses 90% of its budget. """
+
+        entries = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
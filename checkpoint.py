@@ -0,0 +1,63 @@
+import os
+import json
+
+
+class CrawlCheckpoint:
+
+    """ A class persisting the progress of a full-mode crawl to a local JSON state file.
+    Attributes:
+        path (str): Location of the state file.
+        skip (int): Listing offset (`?skip=`) of the first page not yet completed.
+        post_ids (set): post_ids of the articles already fetched. """
+
+    def __init__(self, path='crawl_state.json'):
+
+        """ Initializes an empty checkpoint.
+        Args:
+            path (str): Location of the state file. Defaults to 'crawl_state.json'. """
+
+        self.path = path
+        self.skip = 0
+        self.post_ids = set()
+
+    def load(self):
+
+        """ Reads the state file if it exists.
+        Returns:
+            CrawlCheckpoint: The checkpoint itself, for chaining. """
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.skip = state.get('skip', 0)
+            self.post_ids = set(state.get('post_ids', []))
+            print(f"Resuming crawl from offset {self.skip} ({len(self.post_ids)} articles already fetched).")
+        return self
+
+    def mark_page(self, skip, post_ids):
+
+        """ Records a completed listing page. The state is written on the next save().
+        Args:
+            skip (int): Offset of the next page to crawl.
+            post_ids (iterable): post_ids of the articles on the completed page. """
+
+        self.skip = skip
+        self.post_ids.update(post_ids)
+
+    def save(self):
+
+        """ Atomically writes the state file, so a crash never leaves it half-written. """
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'skip': self.skip, 'post_ids': sorted(self.post_ids)}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+
+        """ Removes the state file once the crawl has completed. """
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.skip = 0
+        self.post_ids = set()
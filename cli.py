@@ -0,0 +1,204 @@
+import sys
+import json
+import argparse
+import importlib
+from datetime import datetime
+from metrics import metrics
+
+# Modules every subcommand needs; they are only imported once the subcommand is known,
+# so e.g. `scrape` never pays for pandas and matplotlib
+MODULES = {'scrape': ['main'],
+           'analyze': ['storage', 'analyzer', 'report'],
+           'export': ['storage', 'archive'],
+           'daemon': ['daemon'],
+           'search': ['storage', 'search']}
+
+
+def load(command):
+
+    """ Imports the modules of a subcommand.
+    Args:
+        command (str): Key of MODULES.
+    Returns:
+        dict: Module name -> module. """
+
+    return {name: importlib.import_module(name) for name in MODULES[command]}
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def _connect(storage, spec, table):
+
+    """ Opens the configured storage backend, creating or upgrading the given news table. """
+
+    db = storage.open_storage(spec)
+    db.connect_to_database()
+    db.use_database()
+    db.prepare_table(table) # The tag tables and the full-text index may be missing on old tables
+    return db
+
+
+def scrape(args):
+
+    """ Runs a one-shot scrape, see main.main. """
+
+    if args.replay and not args.cache_dir:
+        raise SystemExit('--replay requires --cache-dir')
+    if args.replay and args.mode != 'full':
+        # An incremental crawl stops at the first known article, i.e. at once on a replay
+        raise SystemExit('--replay requires --mode full')
+    if args.processes > 1 and (args.mode != 'full' or args.resume or args.cache_dir or args.replay):
+        # Shards are crawled without a checkpoint and without the response cache
+        raise SystemExit('--processes requires --mode full and does not support --resume, --cache-dir or --replay')
+    load('scrape')['main'].main(args.mode, args.workers, args.resume, args.cutoff, args.state_file,
+                                args.cache_dir, args.cache_ttl, args.replay, args.processes,
+                                args.archive_dir, args.report_dir, args.storage, args.overwrite)
+
+
+def analyze(args):
+
+    """ Renders the Analyzer charts to files, or shows them interactively with --show. """
+
+    modules = load('analyze')
+    db = None
+    if args.archive_dir:
+        analyzer = modules['analyzer'].Analyzer.from_archive(args.archive_dir)
+    else:
+        db = _connect(modules['storage'], args.storage, args.table)
+        analyzer = modules['analyzer'].Analyzer(storage=db)
+
+    try:
+        if args.show:
+            analyzer.visualize_popularity(table_name=args.table, since=args.since)
+            analyzer.tags_analysis(table_name=args.table, since=args.since)
+            analyzer.analyze_comments_by_tags(table_name=args.table, since=args.since)
+        else:
+            print(modules['report'].ReportRenderer(analyzer, args.report_dir).render(args.table, args.since, args.force))
+    finally:
+        if db:
+            db.commit_and_close()
+
+
+def export(args):
+
+    """ Brings the Parquet archive up to date with the database. """
+
+    modules = load('export')
+    db = _connect(modules['storage'], args.storage, args.table)
+    try:
+        modules['archive'].ParquetArchive(args.archive_dir).export(db, args.table, full=args.full)
+    finally:
+        db.commit_and_close()
+
+
+def daemon(args):
+
+    """ Polls for new articles until stopped, see daemon.NewsDaemon. """
+
+    load('daemon')['daemon'].run_daemon(args.workers, args.min_interval, args.max_interval, args.metrics_prom, args.storage)
+
+
+def search(args):
+
+    """ Prints the articles matching a full-text query, best matches first. """
+
+    modules = load('search')
+    db = _connect(modules['storage'], args.storage, args.table)
+    if db.name != 'mysql':
+        db.commit_and_close()
+        raise SystemExit('search needs the full-text index of the mysql backend')
+    try:
+        results = modules['search'].NewsSearch(db.conn, args.table).search(args.text, args.since, args.until, args.limit)
+    finally:
+        db.commit_and_close()
+    for article in results:
+        print(f"{article['time']:%Y-%m-%d %H:%M}  {article['post_id']:>8}  {article['score']:6.2f}  {article['header']}")
+
+
+def build_parser():
+
+    """ Builds the argument parser of all subcommands. """
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--storage', default=None,
+                        help="Storage backend: 'mysql', 'sqlite:<path>' or 'duckdb:<path>'. Defaults to $storage, or mysql.")
+    common.add_argument('--metrics-json', default=None, help='File the JSON metrics summary is written to.')
+    common.add_argument('--metrics-prom', default=None, help='File the metrics are written to in Prometheus text format.')
+
+    parser = argparse.ArgumentParser(description='Scrape, analyze and archive fapl.ru news.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scrape_parser = commands.add_parser('scrape', parents=[common], help='Scrape fapl.ru news into the database.')
+    scrape_parser.add_argument('--mode', choices=['full', 'incremental'], default='incremental', help='Scraping mode.')
+    scrape_parser.add_argument('--workers', type=int, default=8, help='Number of concurrent article downloads.')
+    scrape_parser.add_argument('--resume', action='store_true', help='Resume an interrupted full-mode crawl.')
+    scrape_parser.add_argument('--cutoff', type=_date, default=None,
+                               help='Oldest publication date (YYYY-MM-DD) collected in full mode.')
+    scrape_parser.add_argument('--state-file', default='crawl_state.json', help='Location of the full-mode checkpoint.')
+    scrape_parser.add_argument('--cache-dir', default=None, help='Directory of the on-disk HTTP response cache.')
+    scrape_parser.add_argument('--cache-ttl', type=float, default=None, help='Seconds a cached article stays fresh.')
+    scrape_parser.add_argument('--replay', action='store_true',
+                               help='Re-parse cached pages without network access and overwrite the stored articles. '
+                                    'Needs --mode full and --cache-dir.')
+    scrape_parser.add_argument('--overwrite', action='store_true',
+                               help='Replace the header, content, time, tags and signature of articles already stored.')
+    scrape_parser.add_argument('--processes', type=int, default=1, help='Split a full-mode crawl across this many processes. '
+                                    'Not combinable with --resume, --cache-dir or --replay.')
+    scrape_parser.add_argument('--archive-dir', default=None, help='Append the new months to this Parquet archive.')
+    scrape_parser.add_argument('--report-dir', default=None, help='Render the charts whose data changed into this directory.')
+    scrape_parser.set_defaults(handler=scrape)
+
+    analyze_parser = commands.add_parser('analyze', parents=[common], help='Render the analysis charts.')
+    analyze_parser.add_argument('--table', default='news', help='The news table analyzed.')
+    analyze_parser.add_argument('--since', type=_date, default=None, help='Only analyze articles published since YYYY-MM-DD.')
+    analyze_parser.add_argument('--archive-dir', default=None, help='Analyze this Parquet archive instead of the database.')
+    analyze_parser.add_argument('--report-dir', default='reports', help='Directory the charts are rendered into.')
+    analyze_parser.add_argument('--force', action='store_true', help='Render every chart even if its data is unchanged.')
+    analyze_parser.add_argument('--show', action='store_true', help='Display the charts instead of rendering them to files.')
+    analyze_parser.set_defaults(handler=analyze)
+
+    export_parser = commands.add_parser('export', parents=[common], help='Export the news table to the Parquet archive.')
+    export_parser.add_argument('--table', default='news', help='The news table exported.')
+    export_parser.add_argument('--archive-dir', default='news_archive', help='Root directory of the archive.')
+    export_parser.add_argument('--full', action='store_true', help='Rewrite every month instead of only the new ones.')
+    export_parser.set_defaults(handler=export)
+
+    daemon_parser = commands.add_parser('daemon', parents=[common], help='Continuously poll for new articles.')
+    daemon_parser.add_argument('--workers', type=int, default=4, help='Concurrent article downloads.')
+    daemon_parser.add_argument('--min-interval', type=float, default=15.0, help='Seconds between polls right after news.')
+    daemon_parser.add_argument('--max-interval', type=float, default=600.0, help='Longest wait between polls.')
+    daemon_parser.set_defaults(handler=daemon)
+
+    search_parser = commands.add_parser('search', parents=[common], help='Full-text search of the articles.')
+    search_parser.add_argument('text', help='Words every article must mention, in any inflected form.')
+    search_parser.add_argument('--table', default='news', help='The news table searched.')
+    search_parser.add_argument('--since', type=_date, default=None, help='Only articles published since YYYY-MM-DD.')
+    search_parser.add_argument('--until', type=_date, default=None, help='Only articles published before YYYY-MM-DD.')
+    search_parser.add_argument('--limit', type=int, default=50, help='Maximum number of articles listed.')
+    search_parser.set_defaults(handler=search)
+
+    return parser
+
+
+def cli(argv=None):
+
+    """ Runs the subcommand given on the command line and exports the metrics of the run. """
+
+    args = build_parser().parse_args(argv)
+    try:
+        with metrics.timer('run'):
+            args.handler(args)
+    finally:
+        # Export the metrics even if the run failed, they show where it got stuck
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        elif args.command == 'scrape':
+            print(json.dumps(metrics.summary(), indent=2))
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+
+
+if __name__ == '__main__':
+    cli(sys.argv[1:])
@@ -0,0 +1,171 @@
+import signal
+import argparse
+from datetime import datetime
+from threading import Event
+from scraper import Scraper
+from http_client import HttpClient
+from storage import open_storage
+from pipeline import ScrapePipeline
+from metrics import metrics
+
+
+class NewsDaemon:
+
+    """ A class polling the first listing page of fapl.ru in a long-running process.
+    The HTTP client, the database connection and the set of known post_ids stay warm between
+    polls, so a poll without news costs one conditional request. The polling interval backs off
+    while nothing is published and is capped during the hours articles are usually published in.
+    Attributes:
+        db (Storage): Connected storage backend the new articles are written to.
+        scraper (Scraper): Incremental scraper reused by every poll; its `known` set grows with every article.
+        interval (float): Seconds until the next poll.
+        hourly (list): Publication activity of every hour of the day, learned from the articles seen. """
+
+    def __init__(self, db, client=None, table_name='news', workers=4, min_interval=15.0, max_interval=600.0,
+                 peak_interval=60.0, backoff=1.5, known_limit=1000, metrics_path=None, base_url='http://fapl.ru'):
+
+        """ Initializes the daemon.
+        Args:
+            db (Storage): Connected storage backend the new articles are written to.
+            client (HttpClient, optional): Shared HTTP client; a pooled client is created if not given.
+            table_name (str): Name of the table receiving the articles. Defaults to 'news'.
+            workers (int): Concurrent article downloads when several articles are new. Defaults to 4.
+            min_interval (float): Seconds between polls right after news were found. Defaults to 15.
+            max_interval (float): Longest wait between polls. Defaults to 600.
+            peak_interval (float): Longest wait between polls during publication peaks. Defaults to 60.
+            backoff (float): Factor the interval grows by after every poll without news. Defaults to 1.5.
+            known_limit (int): Number of recent post_ids loaded from the database at start. Defaults to 1000.
+            metrics_path (str, optional): File the metrics are written to in Prometheus format after every poll.
+            base_url (str): Site root the news are scraped from. Defaults to 'http://fapl.ru'. """
+
+        self.db = db
+        self.table_name = table_name
+        self.client = client or HttpClient(pool_size=workers + 1)
+        self.scraper = Scraper(db.fetch_recent_post_ids(table_name, known_limit), 'incremental',
+                               workers=workers, client=self.client, base_url=base_url)
+        self.pipeline = ScrapePipeline(db, table_name)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.peak_interval = peak_interval
+        self.backoff = backoff
+        self.metrics_path = metrics_path
+        self.interval = min_interval
+        self.hourly = db.fetch_hourly_activity(table_name)
+        self._stop = Event()
+
+    def stop(self, *args):
+
+        """ Asks the daemon to stop after the current poll. Usable as a signal handler. """
+
+        print("Shutdown requested.")
+        self._stop.set()
+
+    def is_peak(self, now):
+
+        """ Tells whether articles are usually published in the hour of `now`.
+        Returns:
+            bool: True if the hour is at least 1.5 times as active as the average hour. """
+
+        average = sum(self.hourly) / len(self.hourly)
+        return average > 0 and self.hourly[now.hour] >= 1.5 * average
+
+    def poll(self):
+
+        """ Scrapes and stores the articles published since the previous poll.
+        Returns:
+            int: Number of new articles. """
+
+        new = []
+
+        def tracked():
+            for post_id, wrap in self.scraper.iter_articles():
+                new.append(post_id)
+                self.hourly[datetime.strptime(wrap['time'], '%Y-%m-%d %H:%M:%S').hour] += 1
+                yield post_id, wrap
+
+        with metrics.timer('daemon_poll'):
+            self.pipeline.run(tracked())
+        self.scraper.known.update(new) # The next poll stops at the newest of them
+        metrics.incr('daemon_polls')
+        metrics.incr('daemon_new_articles', len(new))
+        return len(new)
+
+    def safe_poll(self):
+
+        """ Runs a poll, keeping the daemon alive through network, parsing and database errors.
+        The batch the failed poll was writing is rolled back, so a later commit cannot store
+        its rows without their tag index entries.
+        Returns:
+            int: Number of new articles, 0 if the poll failed. """
+
+        try:
+            return self.poll()
+        except Exception as err:
+            self.db.rollback()
+            metrics.incr('daemon_errors')
+            print(f"Poll failed: {err}")
+            return 0
+
+    def next_interval(self, found, now):
+
+        """ Adapts the polling interval to the outcome of a poll.
+        Args:
+            found (int): Number of new articles found by the poll.
+            now (datetime): Current local time.
+        Returns:
+            float: Seconds until the next poll. """
+
+        if found:
+            self.interval = self.min_interval # Articles often come in bursts
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        if self.is_peak(now):
+            return min(self.interval, self.peak_interval)
+        return self.interval
+
+    def run(self):
+
+        """ Polls until stop() is called or SIGTERM/SIGINT is received, then commits and closes
+        the database connection and the HTTP client. """
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print(f"Polling with {len(self.scraper.known)} known articles.")
+
+        try:
+            while not self._stop.is_set():
+                found = self.safe_poll()
+                wait = self.next_interval(found, datetime.now())
+                if self.metrics_path:
+                    metrics.write_prometheus(self.metrics_path)
+                print(f"{found} new articles, next poll in {wait:.0f} seconds.")
+                self._stop.wait(wait) # Returns at once on shutdown
+        finally:
+            self.db.commit_and_close() # Final commit of anything written before the shutdown
+            self.client.close()
+            print("Daemon stopped.")
+
+
+def run_daemon(workers=4, min_interval=15.0, max_interval=600.0, metrics_path=None, storage=None):
+
+    """ Connects to the configured storage backend and runs the daemon. """
+
+    db = open_storage(storage)
+    db.connect_to_database()
+    db.use_database()
+    db.prepare_table('news') # Tables of older versions lack the columns and tag tables every write needs
+
+    NewsDaemon(db, workers=workers, min_interval=min_interval, max_interval=max_interval,
+               metrics_path=metrics_path).run()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Continuously poll fapl.ru for new articles.')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent article downloads.')
+    parser.add_argument('--min-interval', type=float, default=15.0, help='Seconds between polls right after news.')
+    parser.add_argument('--max-interval', type=float, default=600.0, help='Longest wait between polls.')
+    parser.add_argument('--storage', default=None, help="Storage backend: 'mysql', 'sqlite:<path>' or 'duckdb:<path>'.")
+    parser.add_argument('--metrics-prom', default=None, help='File the metrics are written to after every poll.')
+    args = parser.parse_args()
+
+    run_daemon(args.workers, args.min_interval, args.max_interval, args.metrics_prom, args.storage)
@@ -0,0 +1,136 @@
+import re
+import struct
+import hashlib
+from random import Random
+from metrics import metrics
+
+NUM_PERM = 64 # Hash functions per signature; a signature is NUM_PERM 32-bit values
+BANDS = 16 # LSH bands of NUM_PERM // BANDS rows: pairs above ~0.5 similarity share a bucket
+SHINGLE = 3 # Words per shingle
+PRIME = (1 << 61) - 1 # Mersenne prime of the universal hash family
+MAX_HASH = (1 << 32) - 1
+
+# (a, b) of the hash functions h(x) = (a * x + b) mod PRIME; seeded, so signatures are stable across runs
+_random = Random(20240101)
+PERMUTATIONS = [(_random.randrange(1, PRIME), _random.randrange(0, PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text, size=SHINGLE):
+
+    """ Splits a text into the set of its overlapping word n-grams, ignoring case and punctuation.
+    Args:
+        text (str): The article content.
+        size (int): Words per shingle. Defaults to 3.
+    Returns:
+        set: The shingles; texts shorter than `size` words form a single shingle. """
+
+    words = re.findall(r'\w+', (text or '').lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text):
+
+    """ Computes the MinHash signature of a text. The share of equal values of two signatures
+    estimates the Jaccard similarity of the shingle sets of the texts.
+    Args:
+        text (str): The article content.
+    Returns:
+        bytes: The packed signature (NUM_PERM * 4 bytes), or None for a text without words. """
+
+    with metrics.timer('minhash'):
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+                  for shingle in shingles(text)]
+        if not hashes:
+            return None
+        return struct.pack(f'<{NUM_PERM}I', *(min((a * h + b) % PRIME for h in hashes) & MAX_HASH
+                                                for a, b in PERMUTATIONS))
+
+
+def similarity(first, second):
+
+    """ Estimates the Jaccard similarity of two texts from their signatures.
+    Returns:
+        float: Between 0 and 1. """
+
+    first = struct.unpack(f'<{NUM_PERM}I', first)
+    second = struct.unpack(f'<{NUM_PERM}I', second)
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+class LSHIndex:
+
+    """ A class finding near-duplicate signatures with locality-sensitive hashing.
+    Every signature is cut into BANDS bands, and each band is hashed into a bucket. Only
+    signatures sharing a bucket are compared, so a lookup costs the size of a few buckets
+    instead of a comparison with every stored article.
+    Attributes:
+        threshold (float): Estimated similarity from which two articles are near-duplicates.
+        signatures (dict): key -> signature of every indexed article. """
+
+    def __init__(self, threshold=0.8):
+
+        """ Initializes an empty index.
+        Args:
+            threshold (float): Estimated similarity from which two articles are near-duplicates. Defaults to 0.8. """
+
+        self.threshold = threshold
+        self.signatures = {}
+        self._buckets = [{} for _ in range(BANDS)]
+        self._band_size = NUM_PERM * 4 // BANDS # Bytes per band
+
+    def _bands(self, signature):
+        signature = bytes(signature) # MySQL returns VARBINARY values as unhashable bytearrays
+        return [signature[i * self._band_size:(i + 1) * self._band_size] for i in range(BANDS)]
+
+    def query(self, signature):
+
+        """ Finds the indexed near-duplicates of a signature.
+        Returns:
+            list: Keys of the indexed articles at or above the threshold. """
+
+        candidates = set()
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        return [key for key in candidates if similarity(signature, self.signatures[key]) >= self.threshold]
+
+    def add(self, key, signature):
+
+        """ Indexes the signature of an article.
+        Returns:
+            list: Keys of the near-duplicates indexed before it. """
+
+        duplicates = self.query(signature)
+        self.signatures[key] = signature
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets.setdefault(band, []).append(key)
+        return duplicates
+
+    def clusters(self, items):
+
+        """ Groups articles into near-duplicate clusters, indexing them in the given order.
+        Args:
+            items (iterable): (key, signature) pairs; pairs without a signature form their own cluster.
+        Returns:
+            dict: key -> key of the first item of its cluster. """
+
+        parent = {}
+        order = {} # Position of every key, the earliest one represents its cluster
+
+        def root(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]] # Path halving
+                key = parent[key]
+            return key
+
+        for key, signature in items:
+            parent[key] = key
+            order[key] = len(order)
+            if signature is None:
+                continue
+            for duplicate in self.add(key, signature):
+                first, second = sorted((root(duplicate), root(key)), key=order.get)
+                if first != second:
+                    parent[second] = first
+        return {key: root(key) for key in parent}
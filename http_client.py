@@ -0,0 +1,232 @@
+import random
+from collections import OrderedDict
+import requests
+from time import sleep, monotonic
+from threading import BoundedSemaphore, Lock
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from cache import CacheMissError
+from metrics import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504} # Responses worth retrying: throttling and server-side failures
+
+
+class RateLimiter:
+
+    """ A class spacing out requests so that no more than `rate` of them start per second.
+    Attributes:
+        interval (float): Minimum number of seconds between two request starts. """
+
+    def __init__(self, rate):
+
+        """ Initializes the limiter.
+        Args:
+            rate (float): Allowed requests per second. 0 or None disables the limit. """
+
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = Lock()
+
+    def wait(self):
+
+        """ Blocks until the caller is allowed to send the next request. """
+
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next) # Reserve the next free slot
+            self._next = start + self.interval
+
+        if start > now:
+            sleep(start - now)
+
+
+class HttpClient:
+
+    """ A class providing a shared HTTP layer for the scraper.
+    Keeps pooled keep-alive connections, caps concurrency and request rate per host,
+    retries failed requests with capped exponential backoff and jitter, and sends
+    conditional GETs (ETag / If-Modified-Since) for pages requested with `conditional=True`.
+    Optionally keeps raw responses in an on-disk ResponseCache and replays them offline.
+    Attributes:
+        session (requests.Session): Session holding the connection pool.
+        cache (ResponseCache): On-disk response cache, or None.
+        offline (bool): Serve every page from the cache and never touch the network. """
+
+    def __init__(self, pool_size=10, per_host=4, rate=5.0, retries=5, backoff=0.5, max_backoff=30.0, timeout=30,
+                 max_validators=256, cache=None, offline=False):
+
+        """ Initializes the client.
+        Args:
+            pool_size (int): Number of keep-alive connections kept per host. Defaults to 10.
+            per_host (int): Maximum number of simultaneous requests to a single host. Defaults to 4.
+            rate (float): Maximum requests per second to a single host, 0 disables the limit. Defaults to 5.
+            retries (int): Number of retries after the first failed attempt. Defaults to 5.
+            backoff (float): Base delay of the exponential backoff in seconds. Defaults to 0.5.
+            max_backoff (float): Upper bound of a single backoff delay in seconds. Defaults to 30.
+            timeout (float): Connect/read timeout of a single request in seconds. Defaults to 30.
+            max_validators (int): Number of conditionally requested pages remembered in memory when
+                no cache is used. Defaults to 256.
+            cache (ResponseCache, optional): On-disk cache of raw responses.
+            offline (bool): Replay pages from the cache only; requires a cache. Defaults to False. """
+
+        if offline and cache is None:
+            raise ValueError("Offline replay mode requires a response cache.")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.per_host = max(1, per_host)
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_validators = max_validators
+        self.cache = cache
+        self.offline = offline
+
+        self._host_slots = {} # One semaphore per host caps the number of in-flight requests
+        self._limiters = {} # One rate limiter per host
+        self._validators = OrderedDict() # url -> (etag, last_modified, text), least recently used first
+        self._lock = Lock()
+
+    def _host(self, url):
+
+        """ Returns the semaphore and rate limiter of the host of the given URL. """
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = BoundedSemaphore(self.per_host)
+                self._limiters[host] = RateLimiter(self.rate)
+            return self._host_slots[host], self._limiters[host]
+
+    def _backoff_delay(self, attempt, response=None):
+
+        """ Returns how long to wait before the next attempt, honouring a Retry-After header. """
+
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(self.max_backoff, float(response.headers['Retry-After']))
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)) # Full jitter
+
+    def request(self, url, headers=None):
+
+        """ Sends a GET request, retrying connection errors, timeouts and retryable statuses.
+        Args:
+            url (str): URL to request.
+            headers (dict, optional): Extra request headers.
+        Returns:
+            requests.Response: The successful (2xx or 304) response.
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries,
+            or immediately on a non-retryable HTTP error. """
+
+        slot, limiter = self._host(url)
+
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                with slot:
+                    limiter.wait()
+                    metrics.incr('http_requests')
+                    with metrics.timer('http_fetch'):
+                        response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES:
+                    raise requests.exceptions.HTTPError(f"{response.status_code} for url: {url}", response=response)
+                response.raise_for_status() # Other 4xx/5xx are not worth retrying
+                return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+                if response is not None and response.status_code not in RETRY_STATUSES:
+                    metrics.incr('http_errors')
+                    raise
+                if attempt == self.retries:
+                    metrics.incr('http_errors')
+                    raise
+                metrics.incr('http_retries')
+                delay = self._backoff_delay(attempt, response)
+                print(f"Request failed: {e}. Retrying in {delay:.1f}s") # Print error message if request fails
+                sleep(delay)
+
+    def get_text(self, url, encoding=None, conditional=False):
+
+        """ Downloads a page and returns its decoded text.
+        With a response cache, fresh entries are served from disk without a request. In offline
+        replay mode every page is served from the cache regardless of its age.
+        Args:
+            url (str): URL of the page.
+            encoding (str, optional): Encoding of the page; detected from the content if not given.
+            conditional (bool): Always revalidate the page with ETag/If-Modified-Since validators of the
+                previous response and reuse its text on 304 Not Modified. Defaults to False.
+        Returns:
+            str: Text of the page.
+        Raises:
+            CacheMissError: In offline mode, if the page is not cached. """
+
+        entry = self.cache.get(url) if self.cache else None
+        if self.cache:
+            metrics.incr('cache_hits' if entry else 'cache_misses')
+        if self.offline:
+            if not entry:
+                raise CacheMissError(url)
+            return self._decode(entry, encoding)
+        if entry and not conditional and self.cache.is_fresh(entry[1]):
+            return self._decode(entry, encoding) # Fresh enough, no request needed
+
+        headers = {}
+        if entry:
+            etag, last_modified = entry[1].get('etag'), entry[1].get('last_modified')
+            cached = None
+        else:
+            cached = self._validators.get(url) if conditional else None
+            etag, last_modified = cached[:2] if cached else (None, None)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        response = self.request(url, headers)
+        metrics.incr('http_bytes_downloaded', len(response.content))
+        if response.status_code == 304:
+            metrics.incr('http_not_modified')
+        if response.status_code == 304 and entry:
+            self.cache.touch(url) # Restart the TTL of the unchanged page
+            return self._decode(entry, encoding)
+        if response.status_code == 304 and cached:
+            return cached[2] # The page has not changed since the previous request
+
+        response.encoding = encoding or response.apparent_encoding # Set the encoding for the response
+        text = response.text
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        if self.cache:
+            self.cache.put(url, response.content, {'encoding': response.encoding,
+                                                   'content_type': response.headers.get('Content-Type'),
+                                                   'etag': etag,
+                                                   'last_modified': last_modified})
+        elif conditional and (etag or last_modified):
+            with self._lock:
+                self._validators[url] = (etag, last_modified, text)
+                self._validators.move_to_end(url)
+                while len(self._validators) > self.max_validators:
+                    self._validators.popitem(last=False) # Forget the least recently requested page
+
+        return text
+
+    def _decode(self, entry, encoding=None):
+
+        """ Decodes the body of a cache entry. """
+
+        body, meta = entry
+        return body.decode(encoding or meta.get('encoding') or 'utf-8', errors='replace')
+
+    def close(self):
+
+        """ Closes all pooled connections. """
+
+        self.session.close()
@@ -1,63 +1,114 @@
-import os
-from dotenv import load_dotenv
+import sys
+from datetime import datetime
 from scraper import Scraper
-from my_sql_db import ConnectToMySql
-from analyzer import Analyzer
+from storage import Storage, open_storage
+from pipeline import ScrapePipeline
+from checkpoint import CrawlCheckpoint
+from http_client import HttpClient
+from cache import ResponseCache
 from typing import Optional
 
-def main(mode: str = 'incremental') -> None:
+def main(mode: str = 'incremental', workers: int = 8, resume: bool = False,
+         cutoff: Optional[datetime] = None, state_file: str = 'crawl_state.json',
+         cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None, replay: bool = False,
+         processes: int = 1, archive_dir: Optional[str] = None, report_dir: Optional[str] = None,
+         storage: Optional[str] = None, overwrite: bool = False) -> None:
     """
     Main function for running the scraper, database operations, and analysis.
 
     Args:
         mode (str): Determines scraping mode. Defaults to 'incremental'.
+        workers (int): Number of concurrent article downloads. Defaults to 8.
+        resume (bool): Continue an interrupted full-mode crawl from its checkpoint. Defaults to False.
+        cutoff (datetime, optional): Oldest publication date collected in full mode. Defaults to 2024-01-01.
+        state_file (str): Location of the full-mode checkpoint. Defaults to 'crawl_state.json'.
+        cache_dir (str, optional): Directory of the on-disk HTTP response cache. Disabled by default.
+        cache_ttl (float, optional): Seconds a cached article stays fresh. Defaults to no expiry.
+        replay (bool): Re-parse pages from the cache only, without network access, overwriting the stored
+            articles with the new parse. Needs mode 'full': an incremental crawl stops at the first known
+            article, which on a replay is the newest one. Defaults to False.
+        processes (int): Split a full-mode crawl across this many processes. Sharded crawls cannot be
+            resumed and do not use the response cache. Defaults to 1.
+        archive_dir (str, optional): Append the new months to this Parquet archive after scraping.
+        report_dir (str, optional): Render the charts whose data changed into this directory after scraping.
+        storage (str, optional): Storage backend spec: 'mysql', 'sqlite:<path>' or 'duckdb:<path>'.
+            Defaults to the `storage` environment variable, or 'mysql'.
+        overwrite (bool): Replace the header, content, time, tags and signature of articles already stored.
+            Always on with `replay`. Defaults to False.
 
     Returns:
         None
     """
 
-    # Load environment variables
-    load_dotenv()
-    host: Optional[str] = os.getenv('host')
-    user: Optional[str] = os.getenv('user')
-    password: Optional[str] = os.getenv('password')
-    database: Optional[str] = os.getenv('database')
-    
+    # The sharded crawl has no checkpoint and no response cache
+    if processes > 1 and (mode != 'full' or resume or cache_dir or replay):
+        raise ValueError("processes > 1 needs mode 'full' and supports neither resume, cache_dir nor replay.")
+
     # Initialize database connection
-    db: ConnectToMySql = ConnectToMySql(host, user, password, database)  # Create a ConnectToMySql instance with the provided host, user, password, and database
+    db: Storage = open_storage(storage)  # Create the configured backend; MySQL reads its host, user, password and database from the environment
     db.connect_to_database()  # Establish a connection to the database
     db.use_database()  # Select the database to use
 
 
-    # Check if table exists; create if not
-    if not db.table_exists('news'):
-        db.create_table('news')
-        print("Table 'news' created.")
-    else:
-        print("Table 'news' already exists.")
+    # Create the table, or upgrade one created by an older version
+    db.prepare_table('news')
     
-    # Fetch recent post IDs from the database
-    last_posts = db.fetch_recent_post_ids('news')
-    
-    # Initialize scraper and fetch new data
-    scraper: Scraper = Scraper(last_posts, mode)
-    data = scraper.scraper()
+    # Multi-process full crawl: every worker writes its own listing range
+    sharded = mode == 'full' and processes > 1
+    if sharded and not db.concurrent_writers:
+        print(f"The {db.name} backend allows a single writer, crawling in one process.")
+        sharded = False
+    if sharded:
+        from sharded import ShardedCrawl  # The process pool is only needed for sharded crawls
+        db.commit_and_close()  # The workers open their own connections
+        ShardedCrawl(storage, cutoff=cutoff, processes=processes, workers=workers, overwrite=overwrite).run()
+        db.connect_to_database()  # Reconnect for the archive export and the report
+        db.use_database()
+    else:
+        # Fetch recent post IDs from the database
+        last_posts = db.fetch_recent_post_ids('news')
+
+        # Full-mode crawls record their progress so that an interrupted backfill can be resumed
+        checkpoint: Optional[CrawlCheckpoint] = None
+        if mode == 'full':
+            checkpoint = CrawlCheckpoint(state_file)
+            if resume:
+                checkpoint.load()
+            else:
+                checkpoint.clear()
 
-    # Insert scraped data into the database
-    db.insert_data('news', data)
+        # Initialize scraper and stream new data into the database in committed batches
+        cache: Optional[ResponseCache] = ResponseCache(cache_dir, ttl=cache_ttl) if cache_dir else None
+        client: HttpClient = HttpClient(pool_size=workers + 1, cache=cache, offline=replay)
+        scraper: Scraper = Scraper(last_posts, mode, workers=workers, client=client, cutoff=cutoff, checkpoint=checkpoint)
+        # A replay exists to re-derive the stored columns, e.g. after a parser fix
+        pipeline: ScrapePipeline = ScrapePipeline(db, 'news', checkpoint=checkpoint, overwrite=overwrite or replay)
+        pipeline.run(scraper.iter_articles())
 
-    # Uncomment the following lines for analysis
-    # analyzer: Analyzer = Analyzer(db.conn)
-    # fetched_data = analyzer.fetch_data('news')
-    # analyzer.visualize_popularity(fetched_data)
-    # analyzer.tags_analysis(fetched_data) 
-    # analyzer.analyze_comments_by_tags(fetched_data)
+        # The crawl has completed, the next full run starts from the top again
+        if checkpoint:
+            checkpoint.clear()
+
+    # Bring the columnar archive up to date for offline analysis
+    if archive_dir:
+        from archive import ParquetArchive  # pyarrow is only needed when archiving
+        ParquetArchive(archive_dir).export(db, 'news')
+
+    # Headless chart rendering for cron hosts
+    if report_dir:
+        from analyzer import Analyzer  # pandas and matplotlib are only needed when rendering
+        from report import ReportRenderer
+        print(ReportRenderer(Analyzer(storage=db), report_dir).render('news'))
+
+    # Interactive analysis has moved to `python cli.py analyze --show`; the aggregations run in the database
+    # analyzer: Analyzer = Analyzer(storage=db)
+    # analyzer.visualize_popularity()
+    # analyzer.tags_analysis()
+    # analyzer.analyze_comments_by_tags()
 
     # Commit changes and close the connection
     db.commit_and_close()
 
 if __name__ == '__main__':
-    main()
-    
-
-
+    from cli import cli
+    cli(['scrape'] + sys.argv[1:])  # `python main.py [options]` is `python cli.py scrape [options]`
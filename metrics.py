@@ -0,0 +1,131 @@
+import os
+import re
+import json
+from time import perf_counter
+from functools import wraps
+from threading import Lock
+from contextlib import contextmanager
+
+
+class Metrics:
+
+    """ A class collecting thread-safe counters and timers of a run.
+    Counters are plain running totals; every timer keeps its number of observations,
+    their sum and their maximum, in seconds. """
+
+    def __init__(self):
+
+        """ Initializes an empty registry. """
+
+        self._lock = Lock()
+        self.counters = {}
+        self.timers = {}
+
+    def incr(self, name, value=1):
+
+        """ Adds `value` to the counter `name`. """
+
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+
+        """ Records one observation of the timer `name`. """
+
+        with self._lock:
+            count, total, peak = self.timers.get(name, (0, 0.0, 0.0))
+            self.timers[name] = (count + 1, total + seconds, max(peak, seconds))
+
+    @contextmanager
+    def timer(self, name):
+
+        """ Times the enclosed block into the timer `name`. """
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - started)
+
+    def timed(self, name):
+
+        """ Decorator timing every call of a function into the timer `name`. """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def merge(self, summary):
+
+        """ Adds the values of a summary() of another registry, e.g. of a worker process. """
+
+        with self._lock:
+            for name, value in summary['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, timer in summary['timers'].items():
+                count, total, peak = self.timers.get(name, (0, 0.0, 0.0))
+                self.timers[name] = (count + timer['count'], total + timer['total'], max(peak, timer['max']))
+
+    def reset(self):
+
+        """ Drops all collected values. """
+
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+
+    def summary(self):
+
+        """ Returns all collected values.
+        Returns:
+            dict: {'counters': {name: value}, 'timers': {name: {count, total, mean, max}}}. """
+
+        with self._lock:
+            return {'counters': dict(sorted(self.counters.items())),
+                    'timers': {name: {'count': count,
+                                      'total': total,
+                                      'mean': total / count if count else 0.0,
+                                      'max': peak}
+                               for name, (count, total, peak) in sorted(self.timers.items())}}
+
+    def write_json(self, path):
+
+        """ Writes the summary as JSON to a file. """
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_prometheus(self, path, prefix='fapl_'):
+
+        """ Writes the summary in the Prometheus text exposition format, e.g. for the
+        node_exporter textfile collector. Counters become `<name>_total`, timers become
+        summaries `<name>_seconds_count` / `<name>_seconds_sum` plus a `<name>_seconds_max` gauge. """
+
+        summary = self.summary()
+        lines = []
+        for name, value in summary['counters'].items():
+            metric = f"{prefix}{_sanitize(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, timer in summary['timers'].items():
+            metric = f"{prefix}{_sanitize(name)}_seconds"
+            lines += [f"# TYPE {metric} summary",
+                      f"{metric}_count {timer['count']}",
+                      f"{metric}_sum {timer['total']}",
+                      f"# TYPE {metric}_max gauge",
+                      f"{metric}_max {timer['max']}"]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path) # The textfile collector must never read a partial file
+
+
+def _sanitize(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+metrics = Metrics() # Registry shared by all stages of a run
@@ -1,8 +1,38 @@
+import os
 import mysql.connector
+from random import uniform
+from time import sleep, monotonic
+from threading import Lock
+from mysql.connector import pooling
+from metrics import metrics
+from tags import normalize_tags
+from storage import Storage, NEWS_COLUMNS
 
-class ConnectToMySql:
+# Server errors after which the connection (and with it the open transaction) is gone: server gone away,
+# lost connection during a query, lost connection, idle client disconnected. mysql.connector maps them
+# to different classes (2006 and 4031 arrive as plain DatabaseError), so they are told apart by errno.
+CONNECTION_ERRNOS = {2006, 2013, 2055, 4031}
+# Errors undoing the transaction (deadlock) or its last statement (lock wait timeout); replaying it succeeds
+TRANSACTION_ERRNOS = {1213, 1205}
+
+
+def is_disconnect(err):
+
+    """ Tells whether a mysql.connector error means the connection is lost. """
+
+    if err.errno in CONNECTION_ERRNOS:
+        return True
+    # Client-side errors such as "MySQL Connection not available" carry no server errno
+    return err.errno in (None, -1) and isinstance(err, (mysql.connector.errors.OperationalError,
+                                                        mysql.connector.errors.InterfaceError))
+
+
+class ConnectToMySql(Storage):
     
-    """ A class to handle MySQL database connections and operations. 
+    """ A class to handle MySQL database connections and operations; the 'mysql' storage backend. 
+    Connections are checked out of a mysql.connector pool shared by all instances with the same
+    server, user and database in a process. An instance is not thread-safe: give every concurrent
+    scraper/writer worker its own instance, they will share the pool.
     Attributes: 
         host (str): Hostname of the MySQL server. 
         user (str): Username to access the MySQL server. 
@@ -11,41 +41,136 @@ class ConnectToMySql:
         conn: Database connection object. 
         cursor: Cursor object to execute queries. """
     
-    def __init__(self, host, user, password, database):
+    _pools = {}  # (pid, host, user, database, pool name) -> MySQLConnectionPool
+    _pools_lock = Lock()
+
+    name = 'mysql'
+    placeholder = '%s'
+    concurrent_writers = True
+
+    def __init__(self, host, user, password, database, pool_size=5, pool_name='fapl', retries=3, pool_timeout=30.0):
         
         """ Initializes the database connection parameters. 
         Args: 
             host (str): Hostname of the MySQL server. 
             user (str): Username to access the MySQL server. 
             password (str): Password for the MySQL user. 
-            database (str): Name of the database to use. """
+            database (str): Name of the database to use. 
+            pool_size (int, optional): Number of connections in the shared pool (default is 5).
+            pool_name (str, optional): Name of the shared pool (default is 'fapl').
+            retries (int, optional): Reconnect attempts after a lost connection (default is 3).
+            pool_timeout (float, optional): Seconds to wait for a free pooled connection (default is 30). """
         
         self.host = host
         self.user = user
         self.password = password
         self.database = database
+        self.pool_size = pool_size
+        self.pool_name = pool_name
+        self.retries = retries
+        self.pool_timeout = pool_timeout
         self.conn = None
         self.cursor = None
+        self._uncommitted = []  # Batches written since the last commit, replayed after a reconnect
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        
+        """ Creates an instance from the host, user, password and database environment variables,
+        read from a .env file if present. Keyword arguments are passed to the constructor. """
+        
+        from dotenv import load_dotenv
+        
+        load_dotenv()
+        return cls(os.getenv('host'), os.getenv('user'), os.getenv('password'), os.getenv('database'), **kwargs)
+
+    def _pool(self):
+        
+        """ Returns the connection pool of this server, creating it on first use. """
+        
+        # Forked processes must not share the sockets of their parent's pool
+        key = (os.getpid(), self.host, self.user, self.database, self.pool_name)
+        with self._pools_lock:
+            if key not in self._pools:
+                self._pools[key] = pooling.MySQLConnectionPool(
+                    pool_name=f"{self.pool_name}_{os.getpid()}",
+                    pool_size=self.pool_size,
+                    pool_reset_session=True,
+                    host=self.host,
+                    user=self.user,
+                    password=self.password,
+                    database=self.database
+                )
+            return self._pools[key]
 
     def connect_to_database(self):
         
-        """ Establishes a connection to the MySQL database. 
+        """ Checks a healthy connection out of the pool, waiting for a free one if all are in use. 
             Sets the conn and cursor attributes. 
             Prints an error message if the connection fails. """
         
         try:
-            self.conn = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
+            pool = self._pool()
+            deadline = monotonic() + self.pool_timeout
+            while True:
+                try:
+                    self.conn = pool.get_connection()
+                    break
+                except mysql.connector.errors.PoolError:
+                    if monotonic() > deadline:
+                        raise
+                    sleep(0.1)  # Every pooled connection is checked out by another worker
+            self.conn.ping(reconnect=True, attempts=self.retries, delay=1)  # Health check of the pooled connection
             self.cursor = self.conn.cursor()
         except mysql.connector.Error as err:
             print(f"Database connection error: {err}")
             self.conn = None
             self.cursor = None
 
+    def _reconnect(self, attempt=0):
+        
+        """ Drops the current connection and checks out a new one after a backoff delay. """
+        
+        metrics.incr('db_reconnects')
+        try:
+            self.conn.close()  # Returns the connection to the pool, which resets it
+        except mysql.connector.Error:
+            pass
+        sleep(min(2 ** attempt, 30))
+        self.connect_to_database()
+        if not self.conn:
+            raise mysql.connector.errors.InterfaceError("Could not reconnect to the database.")
+
+    def _retry(self, operation):
+        
+        """ Runs an operation of the current transaction, replaying the batches written since the
+        last commit if the transaction is lost: after a reconnect when the connection dropped, after
+        a rollback on a deadlock or lock wait timeout. All replayed batches are upserts, so running
+        them twice is harmless. """
+        
+        for attempt in range(self.retries + 1):
+            try:
+                if attempt:
+                    for args in self._uncommitted:
+                        self._write_batch(*args)  # The transaction died with the connection or was rolled back
+                return operation()
+            except mysql.connector.Error as err:
+                transaction_error = err.errno in TRANSACTION_ERRNOS
+                if attempt == self.retries or not (transaction_error or is_disconnect(err)):
+                    raise
+                if transaction_error:
+                    print(f"Transaction aborted: {err}. Replaying it.")
+                    metrics.incr('db_transaction_retries')
+                    try:
+                        self.conn.rollback()  # A lock wait timeout only undoes the failed statement
+                    except mysql.connector.Error:
+                        self._reconnect(attempt)
+                        continue
+                    sleep(uniform(0, 0.1 * 2 ** attempt))  # Jitter, so the other transaction gets its locks first
+                else:
+                    print(f"Lost database connection: {err}. Reconnecting.")
+                    self._reconnect(attempt)
+
     def use_database(self): 
         
         """ Selects the database to use for the connection. 
@@ -110,14 +235,101 @@ class ConnectToMySql:
                 post_visits INT,
                 post_comments INT,
                 post_tags TEXT,
-                PRIMARY KEY (post_id)
+                signature VARBINARY(256),
+                PRIMARY KEY (post_id),
+                INDEX idx_time (time),
+                FULLTEXT INDEX ft_text (header, content)
             );
             """
             self.cursor.execute(query)  # Execute the SQL query to create the table
             print(f"Table '{table_name}' created successfully or already exists.")  # Print a success message
         except mysql.connector.Error as err:
             print(f"Error creating table: {err}")  # Print an error message if there is an exception
+
+        self.create_tag_tables(table_name)
+
+    def create_search_index(self, table_name):
+        
+        """
+        Adds the full-text index over header and content, and the time index used by the
+        search time filters, to a table created before they existed. Does nothing if both exist.
+        Building the full-text index rewrites the table once, which can take a while on large tables.
+        
+        Args:
+            table_name (str): The name of the news table.
+        """
+        
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return
+
+        try:
+            self.cursor.execute("""
+            SELECT DISTINCT index_name
+            FROM information_schema.statistics
+            WHERE table_schema = %s AND table_name = %s
+            """, (self.database, table_name))
+            existing = {record[0] for record in self.cursor.fetchall()}  # Names of the indices the table has
+
+            if 'idx_time' not in existing:
+                self.cursor.execute(f"ALTER TABLE {table_name} ADD INDEX idx_time (time)")
+            if 'ft_text' not in existing:
+                print(f"Building the full-text index of '{table_name}'.")
+                self.cursor.execute(f"ALTER TABLE {table_name} ADD FULLTEXT INDEX ft_text (header, content)")
+        except mysql.connector.Error as err:
+            print(f"Error creating search index: {err}")  # Print an error message if there is an exception
+
+    def create_tag_tables(self, table_name):
+        
+        """
+        Creates the normalized tag index ({table_name}_tags, one row per post and tag) and
+        the per-tag aggregate table ({table_name}_tag_stats) of the given news table.
+        
+        Args:
+            table_name (str): The name of the news table.
+        """
+        
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return
+
+        try:
+            self.cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table_name}_tags (
+                post_id VARCHAR(255) NOT NULL,
+                tag VARCHAR(255) NOT NULL,
+                PRIMARY KEY (post_id, tag),
+                INDEX (tag)
+            );
+            """)
+            self.cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table_name}_tag_stats (
+                tag VARCHAR(255) NOT NULL,
+                articles INT NOT NULL,
+                comments BIGINT NOT NULL,
+                visits BIGINT NOT NULL,
+                PRIMARY KEY (tag)
+            );
+            """)
+        except mysql.connector.Error as err:
+            print(f"Error creating tag tables: {err}")  # Print an error message if there is an exception
  
+    def migrate(self, table_name):
+        
+        """
+        Adds the tag index, the full-text index and the signature column to a table created
+        before they existed. Every step is skipped if it is already done.
+        
+        Args:
+            table_name (str): The name of the news table.
+        """
+        
+        if not self.table_exists(f"{table_name}_tags"):
+            self.migrate_tags(table_name)  # Index the tags of rows written before the tag tables existed
+        self.create_search_index(table_name)
+        if not self.column_exists(table_name, 'signature'):
+            self.migrate_signatures(table_name)  # Near-duplicate signatures of rows written before the column existed
+
     def get_existing_post_ids(self, table_name):
         
         """Returns a list of existing post_ids in the table."""
@@ -134,37 +346,281 @@ class ConnectToMySql:
             print(f"Error fetching data: {err}")  # Print an error message if there is an exception
             return set()  # Return an empty set in case of an error
  
-    def insert_data(self, table_name, data):
-        
-        """Inserts data into the table if the post_id does not already exist."""
+    def insert_data(self, table_name, data, batch_size=500, overwrite=False):
         
+        """
+        Inserts data into the table in batches of multi-row upserts.
+        Rows whose post_id already exists get their post_visits and post_comments updated.
+
+        Args:
+            table_name (str): The name of the table to write to.
+            data (dict): A dictionary where keys are post_ids and values are dictionaries of article details.
+            batch_size (int, optional): Number of rows sent per INSERT statement (default is 500).
+            overwrite (bool, optional): Also replace the header, content, time, tags and signature of
+                existing rows, e.g. when re-parsing cached pages with a fixed parser (default is False).
+
+        Raises:
+            mysql.connector.Error: If the rows could not be written; callers must not commit or record them as done.
+        """
+
         if not self.conn or not self.cursor:
-            print("No database connection.")  # Print an error message if there is no database connection
-            return
+            raise mysql.connector.errors.InterfaceError("No database connection.")
 
         try:
-            # Get the list of existing post_ids
-            existing_ids = self.get_existing_post_ids(table_name)
-
+            if overwrite:
+                # Every column is derived from the page, so a re-parse replaces them all
+                update = ',\n                '.join(f"{column} = VALUES({column})" for column in NEWS_COLUMNS[1:])
+            else:
+                update = """post_visits = VALUES(post_visits),
+                post_comments = VALUES(post_comments),
+                signature = COALESCE(signature, VALUES(signature))"""
             query = f"""
             INSERT INTO {table_name} 
-            (post_id, header, content, time, post_visits, post_comments, post_tags)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
+            (post_id, header, content, time, post_visits, post_comments, post_tags, signature)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                {update}
             """
-            for post_id, fields in data.items():
-                if post_id not in existing_ids:  # Check if the record exists
-                    self.cursor.execute(query, (
-                        post_id,
-                        fields['header'],
-                        fields['content'],
-                        fields['time'],
-                        int(fields['post_visits']),
-                        int(fields['post_comments']),
-                        fields['post_tags']
-                    ))
+            rows = self.rows(data)  # Row tuples ordered as the INSERT columns
+
+            for start in range(0, len(rows), batch_size):
+                # executemany rewrites a batch of INSERTs into a single multi-row statement
+                batch = rows[start:start + batch_size]
+                with metrics.timer('db_insert'):
+                    self._retry(lambda: self._write_batch(table_name, query, batch))
+                self._uncommitted.append((table_name, query, batch))
+                metrics.incr('db_rows_written', len(batch))
             print("Data successfully added to the table.")  # Print a success message
         except mysql.connector.Error as err:
             print(f"Error inserting data: {err}")  # Print an error message if there is an exception
+            raise  # The rows are not written, the caller must not treat them as stored
+
+    def _write_batch(self, table_name, query, batch):
+        
+        """Upserts one batch of rows and updates the tag index and aggregates accordingly."""
+        
+        post_ids = sorted({row[0] for row in batch})  # Sorted, so concurrent writers lock the rows in the same order
+        marks = ', '.join(['%s'] * len(post_ids))
+
+        # Lock the rows first: a concurrent writer of the same articles waits until this one commits,
+        # so the counts subtracted below are the ones the aggregates hold
+        self.cursor.execute(f"""
+        SELECT post_id, post_comments, post_visits FROM {table_name}
+        WHERE post_id IN ({marks}) FOR UPDATE
+        """, post_ids)
+        before = {post_id: (comments, visits) for post_id, comments, visits in self.cursor.fetchall()}
+        self.cursor.execute(f"SELECT post_id, tag FROM {table_name}_tags WHERE post_id IN ({marks})", post_ids)
+        old_tags = self.cursor.fetchall()
+
+        self.cursor.executemany(query, batch)
+
+        # Index the tags as stored: without overwrite the upsert keeps the post_tags of existing rows
+        self.cursor.execute(f"""
+        SELECT post_id, post_tags, post_comments, post_visits FROM {table_name}
+        WHERE post_id IN ({marks})
+        """, post_ids)
+        stored = self.cursor.fetchall()
+        new_tags = [(post_id, tag) for post_id, post_tags, _, _ in stored for tag in normalize_tags(post_tags)]
+        after = {post_id: (comments, visits) for post_id, _, comments, visits in stored}
+
+        self._index_tags(table_name, post_ids, old_tags, new_tags)
+        self._update_tag_stats(table_name, old_tags, before, new_tags, after)
+
+    def _index_tags(self, table_name, post_ids, old_tags, new_tags):
+        
+        """
+        Replaces the tag index entries of freshly written rows.
+        
+        Args:
+            table_name (str): The name of the news table.
+            post_ids (list): post_ids of the written rows.
+            old_tags (list): (post_id, tag) pairs indexed before the write.
+            new_tags (list): (post_id, tag) pairs of the stored rows.
+        """
+        
+        if set(old_tags) == set(new_tags):
+            return  # Re-scraped articles rarely change their tags
+
+        marks = ', '.join(['%s'] * len(post_ids))
+        self.cursor.execute(f"DELETE FROM {table_name}_tags WHERE post_id IN ({marks})", post_ids)
+        if new_tags:
+            self.cursor.executemany(f"INSERT IGNORE INTO {table_name}_tags (post_id, tag) VALUES (%s, %s)", new_tags)
+
+    def _update_tag_stats(self, table_name, old_tags, before, new_tags, after):
+        
+        """
+        Applies the change of a write to the per-tag aggregates: the old counts of the rows are
+        subtracted from the tags they had, the new counts added to the tags they have now.
+        Only the touched aggregate rows are updated, whatever the number of articles of a tag.
+        
+        Args:
+            table_name (str): The name of the news table.
+            old_tags (list): (post_id, tag) pairs indexed before the write.
+            before (dict): post_id -> (post_comments, post_visits) before the write.
+            new_tags (list): (post_id, tag) pairs of the stored rows.
+            after (dict): post_id -> (post_comments, post_visits) after the write.
+        """
+        
+        deltas = {}  # tag -> [articles, comments, visits]
+        for pairs, counts, sign in ((old_tags, before, -1), (new_tags, after, 1)):
+            for post_id, tag in pairs:
+                comments, visits = counts.get(post_id, (0, 0))
+                delta = deltas.setdefault(tag, [0, 0, 0])
+                delta[0] += sign
+                delta[1] += sign * (comments or 0)
+                delta[2] += sign * (visits or 0)
+
+        # Sorted, so concurrent writers lock the aggregate rows in the same order
+        changed = [(tag, *delta) for tag, delta in sorted(deltas.items()) if any(delta)]
+        if not changed:
+            return
+        self.cursor.executemany(f"""
+        INSERT INTO {table_name}_tag_stats (tag, articles, comments, visits)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            articles = articles + VALUES(articles),
+            comments = comments + VALUES(comments),
+            visits = visits + VALUES(visits)
+        """, changed)
+
+        dropped = [tag for tag, articles, _, _ in changed if articles < 0]
+        if dropped:
+            marks = ', '.join(['%s'] * len(dropped))
+            # Tags without articles left disappear, as they would from a full rebuild
+            self.cursor.execute(f"DELETE FROM {table_name}_tag_stats WHERE tag IN ({marks}) AND articles <= 0", dropped)
+
+    def _refresh_tag_stats(self, table_name):
+        
+        """
+        Rebuilds the aggregates of all tags from the tag index.
+        
+        Args:
+            table_name (str): The name of the news table.
+        """
+        
+        self.cursor.execute(f"DELETE FROM {table_name}_tag_stats")
+        self.cursor.execute(f"""
+        INSERT INTO {table_name}_tag_stats (tag, articles, comments, visits)
+        SELECT t.tag, COUNT(*), COALESCE(SUM(n.post_comments), 0), COALESCE(SUM(n.post_visits), 0)
+        FROM {table_name}_tags t JOIN {table_name} n ON n.post_id = t.post_id
+        GROUP BY t.tag
+        """)
+
+    def migrate_tags(self, table_name, batch_size=5000):
+        
+        """
+        One-off migration building the tag index and aggregates of rows written before they existed.
+        Safe to run again: existing index entries are kept and the aggregates are rebuilt.
+        
+        Args:
+            table_name (str): The name of the news table.
+            batch_size (int, optional): Number of news rows read per round-trip (default is 5000).
+        """
+        
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return
+
+        self.create_tag_tables(table_name)
+        try:
+            last_post_id = ''
+            migrated = 0
+            while True:
+                # Walk the primary key instead of using OFFSET, so every batch is an index range scan
+                self.cursor.execute(f"""
+                SELECT post_id, post_tags FROM {table_name}
+                WHERE post_id > %s
+                ORDER BY post_id
+                LIMIT %s;
+                """, (last_post_id, batch_size))
+                rows = self.cursor.fetchall()
+                if not rows:
+                    break
+
+                pairs = [(post_id, tag) for post_id, post_tags in rows for tag in normalize_tags(post_tags)]
+                if pairs:
+                    self.cursor.executemany(f"INSERT IGNORE INTO {table_name}_tags (post_id, tag) VALUES (%s, %s)", pairs)
+                last_post_id = rows[-1][0]
+                migrated += len(rows)
+
+            self._refresh_tag_stats(table_name)
+            self.conn.commit()
+            print(f"Tag index built for {migrated} articles.")  # Print a success message
+        except mysql.connector.Error as err:
+            print(f"Error migrating tags: {err}")  # Print an error message if there is an exception
+
+    def column_exists(self, table_name, column_name):
+        
+        """
+        Checks if a table has a column.
+
+        Args:
+            table_name (str): The name of the table.
+            column_name (str): The name of the column to check.
+
+        Returns:
+            bool: True if the column exists, False otherwise.
+        """
+        
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return False
+
+        query = """
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s AND column_name = %s
+        """
+        try:
+            self.cursor.execute(query, (self.database, table_name, column_name))
+            return self.cursor.fetchone()[0] > 0  # Return True if the column exists, otherwise False
+        except mysql.connector.Error as err:
+            print(f"Error checking column existence: {err}")  # Print an error message if there is an exception
+            return False
+
+    def migrate_signatures(self, table_name, batch_size=1000):
+        
+        """
+        One-off migration adding the MinHash signature column and computing the signatures
+        of rows written before it existed. Safe to run again: only rows without a signature are read.
+        
+        Args:
+            table_name (str): The name of the news table.
+            batch_size (int, optional): Number of news rows read per round-trip (default is 1000).
+        """
+        
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return
+
+        from dedup import minhash  # Only needed by the migration
+        try:
+            if not self.column_exists(table_name, 'signature'):
+                self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN signature VARBINARY(256)")
+
+            last_post_id = ''
+            migrated = 0
+            while True:
+                # Walk the primary key instead of using OFFSET, so every batch is an index range scan
+                self.cursor.execute(f"""
+                SELECT post_id, content FROM {table_name}
+                WHERE post_id > %s AND signature IS NULL
+                ORDER BY post_id
+                LIMIT %s;
+                """, (last_post_id, batch_size))
+                rows = self.cursor.fetchall()
+                if not rows:
+                    break
+
+                signatures = [(minhash(content), post_id) for post_id, content in rows]
+                self.cursor.executemany(f"UPDATE {table_name} SET signature = %s WHERE post_id = %s", signatures)
+                self.conn.commit()  # Keep the transactions of large tables short
+                last_post_id = rows[-1][0]
+                migrated += len(rows)
+
+            print(f"Signatures computed for {migrated} articles.")  # Print a success message
+        except mysql.connector.Error as err:
+            print(f"Error migrating signatures: {err}")  # Print an error message if there is an exception
 
     def fetch_recent_post_ids(self, table_name, limit=100):
         """
@@ -194,16 +650,73 @@ class ConnectToMySql:
             print(f"Error fetching data: {err}")  # Print an error message if there is an exception
             return []  # Return an empty list in case of error
 
-    def commit_and_close(self):
-        
-        """Commits any pending transactions and closes the database connection."""
+    def fetch_hourly_activity(self, table_name, days=28):
+        """
+        Counts the articles published in every hour of the day over the last days.
+
+        Args:
+            table_name (str): The name of the table to query.
+            days (int, optional): Length of the observed period (default is 28).
+
+        Returns:
+            list: 24 article counts indexed by hour, all zero in case of error.
+        """
+        hourly = [0] * 24
+        if not self.conn or not self.cursor:
+            print("No database connection.")  # Print an error message if there is no database connection
+            return hourly
+
+        try:
+            query = f"""
+            SELECT HOUR(time), COUNT(*) FROM {table_name}
+            WHERE time >= NOW() - INTERVAL %s DAY
+            GROUP BY HOUR(time);
+            """
+            self.cursor.execute(query, (days,))  # The time index limits the scan to the observed period
+            for hour, count in self.cursor.fetchall():
+                hourly[hour] = count
+        except mysql.connector.Error as err:
+            print(f"Error fetching data: {err}")  # Print an error message if there is an exception
+        return hourly
+
+    def commit(self):
+
+        """Commits pending transactions, keeping the connection open.
+        Raises mysql.connector.Error if the commit fails, so callers do not record the batches as done."""
         
         if self.conn:
             try:
-                self.conn.commit()  # Commit any pending transactions
+                with metrics.timer('db_commit'):
+                    self._retry(lambda: self.conn.commit())  # Commit any pending transactions
+                self._uncommitted = []
             except mysql.connector.Error as err:
                 print(f"Error committing changes: {err}")  # Print an error message if there is an exception during commit
+                raise
+
+    def rollback(self):
+
+        """Discards the batches written since the last commit, keeping the connection open."""
+        
+        self._uncommitted = []  # They must not be replayed by a later reconnect either
+        if self.conn:
+            try:
+                self.conn.rollback()
+            except mysql.connector.Error as err:
+                print(f"Error rolling back changes: {err}")  # A lost connection took the transaction with it
+
+    def commit_and_close(self):
+        
+        """Commits any pending transactions and returns the connection to the pool."""
+        
+        if self.conn:
+            try:
+                self.commit()  # Commit any pending transactions
             finally:
-                self.cursor.close()  # Close the cursor
-                self.conn.close()  # Close the database connection
+                try:
+                    self.cursor.close()  # Close the cursor
+                    self.conn.close()  # Return the connection to the pool
+                except mysql.connector.Error as err:
+                    print(f"Error closing the connection: {err}")  # Print an error message if the connection is already gone
+                self.conn = None
+                self.cursor = None
 
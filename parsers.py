@@ -0,0 +1,177 @@
+from datetime import datetime
+from metrics import metrics
+
+# libxml2 and HTML5 parsers turn '\r\n' and '\r' into '\n' while reading, BeautifulSoup's html.parser
+# keeps them. Those backends parse the page with '\r' swapped for a private-use character and swap
+# it back in the strings they return, so they see exactly the text BeautifulSoup sees.
+CR_MARK = '\ue000'
+
+
+def _mark_cr(html):
+    return html.replace('\r', CR_MARK)
+
+
+def _unmark_cr(text):
+    return text.replace(CR_MARK, '\r')
+
+
+def _same_class(node_class, value):
+    # Class attributes compare as BeautifulSoup compares a multi-word class_: whitespace-separated words in order
+    return ' '.join((node_class or '').split()) == value
+
+
+class BaseParser:
+
+    """ Common part of the HTML parser backends.
+    Backends only locate the raw strings of a page (_listing, _article); the conversion
+    of those strings into field values is shared, so all backends return identical results. """
+
+    name = None
+
+    def _listing(self, html):
+        raise NotImplementedError
+
+    def _article(self, html):
+        raise NotImplementedError
+
+    def _clean_paragraph(self, text):
+        return text.replace('\n\r\n', '').strip()
+
+    def parse_listing(self, html):
+
+        """ Extracts the articles of a listing page.
+        Args:
+            html (str): Decoded listing page.
+        Returns:
+            list: (post, post_comments) tuples in page order, where post is the article path. """
+
+        with metrics.timer('parse_listing'):
+            return [(href.strip(), int(comments.split(' (')[1].replace(')', '').strip()))
+                    for href, comments in self._listing(html)]
+
+    def parse_article(self, html):
+
+        """ Extracts all fields of an article page.
+        Args:
+            html (str): Decoded article page.
+        Returns:
+            tuple: (header, content, tags, visits, time) of the article. """
+
+        with metrics.timer('parse_article'):
+            header, paragraphs, tags, visits, date = self._article(html)
+            return (header.strip(),
+                    ' '.join(self._clean_paragraph(p) for p in paragraphs).strip(),
+                    tags.strip(),
+                    visits.strip().split(': ')[1],
+                    datetime.strptime(date.strip(), '%d.%m.%Y %H:%M'))
+
+
+class SoupParser(BaseParser):
+
+    """ The reference BeautifulSoup ('html.parser') backend. """
+
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup # Only imported when this backend is used
+
+        self._soup = BeautifulSoup
+
+    def _listing(self, html):
+        soup = self._soup(html, 'html.parser') # Parse the HTML content
+        return [(article.find('h3').find('a')['href'], article.find('p', class_='f-r').text)
+                for article in soup.find_all('div', class_='block news')] # Find all news blocks
+
+    def _article(self, html):
+        soup = self._soup(html, 'html.parser') # Parse the HTML content
+        return (soup.find('div', class_='block').find('h2').text, # Post header
+                [p.text for p in soup.find('div', class_='content').find_all('p')], # Post content paragraphs
+                soup.find('div', class_='info').find('p', class_='tags').text, # Post tags
+                soup.find('p', class_='visits f-l').text, # Post visits
+                soup.find('p', class_='date f-r').text) # Post time
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlParser(BaseParser):
+
+    """ libxml2 backend with XPath expressions compiled once per parser. """
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html # Optional dependency
+
+        self._fromstring = lxml_html.fromstring
+        self._news = etree.XPath("//div[normalize-space(@class)='block news']")
+        self._href = etree.XPath("string(((.//h3)[1]//a)[1]/@href)")
+        self._comments = etree.XPath(f"string((.//p[{_has_class('f-r')}])[1])")
+        self._header = etree.XPath(f"string(((//div[{_has_class('block')}])[1]//h2)[1])")
+        self._paragraphs = etree.XPath(f"(//div[{_has_class('content')}])[1]//p")
+        self._tags = etree.XPath(f"string(((//div[{_has_class('info')}])[1]//p[{_has_class('tags')}])[1])")
+        self._visits = etree.XPath("string((//p[normalize-space(@class)='visits f-l'])[1])")
+        self._date = etree.XPath("string((//p[normalize-space(@class)='date f-r'])[1])")
+
+    def _listing(self, html):
+        tree = self._fromstring(_mark_cr(html))
+        return [(_unmark_cr(self._href(article)), _unmark_cr(self._comments(article))) for article in self._news(tree)]
+
+    def _article(self, html):
+        tree = self._fromstring(_mark_cr(html))
+        return (_unmark_cr(self._header(tree)),
+                [_unmark_cr(p.text_content()) for p in self._paragraphs(tree)],
+                _unmark_cr(self._tags(tree)),
+                _unmark_cr(self._visits(tree)),
+                _unmark_cr(self._date(tree)))
+
+
+class SelectolaxParser(BaseParser):
+
+    """ lexbor (selectolax) backend driven by CSS selectors. """
+
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser # Optional dependency
+
+        self._parse = LexborHTMLParser
+
+    def _first(self, tree, selector, value):
+        # First node of the selector whose class attribute is exactly `value`, up to whitespace
+        return next((node for node in tree.css(selector) if _same_class(node.attributes.get('class'), value)), None)
+
+    def _listing(self, html):
+        tree = self._parse(_mark_cr(html))
+        return [(_unmark_cr(article.css_first('h3 a').attributes['href']), _unmark_cr(article.css_first('p.f-r').text()))
+                for article in tree.css('div.block.news')
+                if _same_class(article.attributes.get('class'), 'block news')]
+
+    def _article(self, html):
+        tree = self._parse(_mark_cr(html))
+        return (_unmark_cr(tree.css_first('div.block').css_first('h2').text()),
+                [_unmark_cr(p.text()) for p in tree.css_first('div.content').css('p')],
+                _unmark_cr(tree.css_first('div.info').css_first('p.tags').text()),
+                _unmark_cr(self._first(tree, 'p.visits.f-l', 'visits f-l').text()),
+                _unmark_cr(self._first(tree, 'p.date.f-r', 'date f-r').text()))
+
+
+PARSERS = {'lxml': LxmlParser, 'selectolax': SelectolaxParser, 'bs4': SoupParser}
+
+
+def get_parser(name='auto'):
+
+    """ Creates a parser backend, falling back to BeautifulSoup when the requested one is not installed.
+    Args:
+        name (str): 'lxml', 'selectolax', 'bs4', or 'auto' for the fastest available. Defaults to 'auto'.
+    Returns:
+        BaseParser: The parser backend. """
+
+    names = ['lxml', 'selectolax'] if name == 'auto' else [name]
+    for candidate in names:
+        try:
+            return PARSERS[candidate]()
+        except ImportError:
+            print(f"Parser '{candidate}' is not installed, falling back.")
+    return SoupParser()
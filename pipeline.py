@@ -0,0 +1,71 @@
+from time import monotonic
+
+
+class ScrapePipeline:
+
+    """ A class streaming scraped articles into the database in periodic committed batches.
+    Attributes:
+        db (Storage): Connected storage backend to write to.
+        table_name (str): Name of the table receiving the articles.
+        batch_size (int): Number of articles written and committed at once.
+        flush_interval (float): Maximum number of seconds an article waits in the buffer.
+        checkpoint (CrawlCheckpoint): Crawl progress saved after every commit, if given.
+        overwrite (bool): Whether existing rows get all their columns replaced, see Storage.insert_data. """
+
+    def __init__(self, db, table_name='news', batch_size=200, flush_interval=30.0, checkpoint=None, overwrite=False):
+
+        """ Initializes the pipeline.
+        Args:
+            db (Storage): Connected storage backend to write to.
+            table_name (str): Name of the table receiving the articles. Defaults to 'news'.
+            batch_size (int): Number of articles written and committed at once. Defaults to 200.
+            flush_interval (float): Maximum number of seconds an article waits in the buffer. Defaults to 30.
+            checkpoint (CrawlCheckpoint, optional): Crawl progress saved after every commit.
+            overwrite (bool): Replace the header, content, time, tags and signature of existing rows
+                instead of only refreshing their counters. Defaults to False. """
+
+        self.db = db
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint = checkpoint
+        self.overwrite = overwrite
+
+    def _flush(self, batch):
+
+        """ Writes a batch to the database and commits it.
+        A failed write or commit raises before the checkpoint is saved, so the crawl stops and
+        a resumed crawl scrapes the pages of the lost batch again. """
+
+        self.db.insert_data(self.table_name, batch, batch_size=self.batch_size,
+                            overwrite=self.overwrite) # Raises if the rows were not written
+        self.db.commit() # Make the batch durable before scraping further
+        if self.checkpoint:
+            self.checkpoint.save() # Only pages whose articles are all committed are recorded
+        print(f"Committed {len(batch)} articles.")
+
+    def run(self, articles):
+
+        """ Consumes (post_id, wrap) pairs, e.g. from Scraper.iter_articles, and stores them.
+        Args:
+            articles (iterable): Pairs of post_id and article details.
+        Returns:
+            int: Number of articles written. """
+
+        batch = {}
+        total = 0
+        started = monotonic()
+
+        for post_id, wrap in articles:
+            batch.setdefault(post_id, wrap) # Keep the first occurrence within a batch, as Scraper.scraper does
+            if len(batch) >= self.batch_size or monotonic() - started >= self.flush_interval:
+                self._flush(batch)
+                total += len(batch)
+                batch = {}
+                started = monotonic()
+
+        if batch:
+            self._flush(batch)
+            total += len(batch)
+
+        return total
@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from analyzer import Analyzer, CHART_SIZES, draw_popularity, draw_tag_frequency, draw_comments_by_tags
+from metrics import metrics
+
+DRAWERS = {'popularity': draw_popularity,
+           'tag_frequency': draw_tag_frequency,
+           'comments_by_tags': draw_comments_by_tags}
+
+
+def render_chart(name: str, aggregate, output_dir: str, formats: Iterable[str]) -> List[str]:
+    """
+    Renders one chart to files on the Agg backend, without touching pyplot's global state.
+    Module-level so that it can run in a worker process.
+
+    Args:
+        name (str): Key of the chart in DRAWERS.
+        aggregate: The input of the chart.
+        output_dir (str): Directory the files are written to.
+        formats (iterable): File formats, e.g. ('png', 'svg').
+
+    Returns:
+        list: Paths of the written files.
+    """
+    fig = Figure(figsize=CHART_SIZES[name])
+    FigureCanvasAgg(fig)  # Attach a headless canvas
+    DRAWERS[name](fig.add_subplot(), aggregate)
+    fig.tight_layout()  # Adjust subplots to fit into the figure area
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        fig.savefig(f"{path}.tmp", format=fmt)
+        os.replace(f"{path}.tmp", path)  # Never publish a half-written chart
+        paths.append(path)
+    return paths
+
+
+class ReportRenderer:
+
+    """ A class rendering all Analyzer charts to image files in one headless batch.
+    Chart inputs are aggregated first, then the charts whose input changed since the last run
+    are rendered in parallel across a process pool. The hash of every input is kept in a
+    manifest next to the images.
+    Attributes:
+        analyzer (Analyzer): Source of the chart inputs.
+        output_dir (str): Directory the charts are written to.
+        formats (tuple): File formats of every chart. """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, analyzer: Analyzer, output_dir: str = 'reports', formats: Iterable[str] = ('png', 'svg'),
+                 processes: Optional[int] = None):
+        """
+        Initializes the renderer.
+
+        Args:
+            analyzer (Analyzer): Source of the chart inputs.
+            output_dir (str): Directory the charts are written to. Defaults to 'reports'.
+            formats (iterable): File formats of every chart. Defaults to ('png', 'svg').
+            processes (int, optional): Size of the rendering process pool. Defaults to one per chart.
+        """
+        self.analyzer = analyzer
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.processes = processes
+
+    def aggregates(self, table_name: str = 'news', since: Optional[datetime] = None) -> Dict[str, object]:
+        """
+        Computes the inputs of all charts.
+
+        Returns:
+            dict: Chart name -> its input.
+        """
+        # The tag charts share one aggregation
+        tag_data = self.analyzer.tag_aggregates(table_name, since)
+        return {'popularity': self.analyzer.popularity_data(None, table_name, since),
+                'tag_frequency': tag_data['articles'].sort_values(ascending=False).head(10),
+                'comments_by_tags': tag_data['post_comments'].sort_values(ascending=False).head(10)}
+
+    def _fingerprint(self, aggregate) -> str:
+        payload = aggregate.to_json(date_format='iso') + json.dumps(self.formats)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.output_dir, self.MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @metrics.timed('report_render')
+    def render(self, table_name: str = 'news', since: Optional[datetime] = None, force: bool = False) -> Dict[str, str]:
+        """
+        Renders every chart whose input changed since the previous run.
+
+        Args:
+            table_name (str): The table the charts are built from. Defaults to 'news'.
+            since (datetime, optional): Only consider articles published at or after this time.
+            force (bool): Render every chart even if its input is unchanged. Defaults to False.
+
+        Returns:
+            dict: Chart name -> 'rendered' or 'unchanged'.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        status = {}
+        pending = {}
+
+        for name, aggregate in self.aggregates(table_name, since).items():
+            fingerprint = self._fingerprint(aggregate)
+            files_exist = all(os.path.exists(os.path.join(self.output_dir, f"{name}.{fmt}")) for fmt in self.formats)
+            if not force and files_exist and manifest.get(name) == fingerprint:
+                status[name] = 'unchanged'
+                metrics.incr('report_charts_skipped')
+                continue
+            pending[name] = (aggregate, fingerprint)
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.processes or len(pending)) as executor:
+                futures = {name: executor.submit(render_chart, name, aggregate, self.output_dir, self.formats)
+                           for name, (aggregate, _) in pending.items()}
+                for name, future in futures.items():
+                    future.result()
+                    manifest[name] = pending[name][1]
+                    status[name] = 'rendered'
+                    metrics.incr('report_charts_rendered')
+
+        with open(os.path.join(self.output_dir, self.MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return status
@@ -1,97 +1,158 @@
-import requests
-import pandas as pd
-from time import sleep
 from datetime import datetime
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from http_client import HttpClient
+from parsers import get_parser
+from dedup import minhash
+from metrics import metrics
 
 
 class Scraper:
 
     """ A class to handle web scraping tasks."""
-    
-    def __init__(self, data, mode='incremental'): 
-        
-        """ Initializes the scraper with a specified mode. 
-        Args: 
-            data (list): A list of post_id that already exist in the database. 
-            mode (str): Mode of scraping ('full' or 'incremental'). Defaults to 'incremental'. """ 
-        
-        self.data = data 
-        self.mode = mode 
-        self.url = 'http://fapl.ru/news/' # Base URL for scraping news
 
-    def scraper(self):
-        
-        """ Scrapes news articles from the specified URL and returns a dictionary with article details. 
-        Returns: 
-            dict: A dictionary where keys are post_ids and values are dictionaries of article details. """
-        
-        result = {}
-        page = 0
+    def __init__(self, data, mode='incremental', workers=8, per_host=4, client=None, cutoff=None, checkpoint=None,
+                 parser='auto', base_url='http://fapl.ru', start_page=0, end_page=None):
+
+        """ Initializes the scraper with a specified mode.
+        Args:
+            data (list): A list of post_id that already exist in the database.
+            mode (str): Mode of scraping ('full' or 'incremental'). Defaults to 'incremental'.
+            workers (int): Number of threads fetching article pages concurrently. Defaults to 8.
+            per_host (int): Maximum number of simultaneous requests to a single host. Defaults to 4.
+            client (HttpClient, optional): Shared HTTP client; a pooled client is created if not given.
+            cutoff (datetime, optional): Full mode stops at the first article published before it. Defaults to 2024-01-01.
+            checkpoint (CrawlCheckpoint, optional): Full-mode progress; the crawl starts from its offset and
+                skips its already fetched articles, and every completed listing page is recorded in it.
+            parser (str): HTML parser backend: 'lxml', 'selectolax', 'bs4' or 'auto'. Defaults to 'auto'.
+            base_url (str): Site root the news are scraped from. Defaults to 'http://fapl.ru'.
+            start_page (int): Listing offset (`?skip=`) the crawl starts at, unless a checkpoint is given. Defaults to 0.
+            end_page (int, optional): Listing offset the crawl stops before. Defaults to None (no limit). """
+
+        self.data = data
+        self.known = set(data) # Constant-time lookups of already stored post_ids
+        self.mode = mode
+        self.base_url = base_url.rstrip('/')
+        self.url = f"{self.base_url}/news/" # Base URL for scraping news
+        self.workers = max(1, workers)
+        self.client = client or HttpClient(pool_size=self.workers + 1, per_host=per_host)
+        self.cutoff = cutoff or datetime(2024, 1, 1)
+        self.checkpoint = checkpoint if mode == 'full' else None # Incremental runs always start from the top
+        self.parser = get_parser(parser)
+        self.start_page = start_page
+        self.end_page = end_page
+
+    def fetch_article(self, url):
+
+        """ Downloads and parses a single article page.
+        Args:
+            url (str): Full URL of the article.
+        Returns:
+            tuple: (header, content, tags, visits, time) of the article. """
+
+        post_text = self.client.get_text(url) # Download the post, detecting its encoding
+        return self.parser.parse_article(post_text) # Extract header, content, tags, visits and time
+
+    def listing_url(self, page):
+
+        """ Returns the URL of the listing page at offset `page`. """
+
+        return self.url if not page else f"{self.url}?skip={page}"
+
+    def fetch_listing(self, page):
+
+        """ Downloads and parses the listing page at offset `page`.
+        Returns:
+            list: (post, post_comments) tuples in page order. """
+
+        listing_text = self.client.get_text(self.listing_url(page), encoding='Windows-1251', conditional=True) # Send a conditional request to URL
+        news = self.parser.parse_listing(listing_text) # Find all news blocks
+        metrics.incr('listing_pages')
+        return news
+
+    def page_oldest_time(self, page):
+
+        """ Returns the publication time of the last (oldest) article of the listing page at offset `page`.
+        Returns:
+            datetime: The publication time, or None if the page has no news. """
+
+        news = self.fetch_listing(page)
+        if not news:
+            return None
+        return self.fetch_article(f"{self.base_url}{news[-1][0]}")[4]
+
+    def iter_articles(self):
+
+        """ Scrapes news articles from the specified URL and yields them as soon as they are parsed.
+        Article pages of each listing page are fetched concurrently, but yielded in listing order,
+        so the full-mode date cutoff behaves exactly as with sequential fetching. In incremental mode
+        the cutoff is decided from the listing page alone and known articles are never downloaded.
+        Yields:
+            tuple: (post_id, wrap) where wrap is a dictionary of article details. """
+
+        page = self.checkpoint.skip if self.checkpoint else self.start_page
         flag = False
 
-        while True:
-            while True:
-                try:
-                    responce = requests.get(self.url if not page else f"{self.url}?skip={page}") # Send request to URL
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while self.end_page is None or page < self.end_page:
+                news = self.fetch_listing(page)
+
+                if not news:
+                    print("No news on the page. Ending scraping.") # Print message if no news is found
                     break
-                except requests.exceptions.RequestException as e:
-                    print(f"Request failed: {e}") # Print error message if request fails
-                    sleep(2) # Wait for 2 seconds before retrying
-            responce.encoding = 'Windows-1251' # Set the encoding for the response
-            soup = BeautifulSoup(responce.text, 'html.parser') # Parse the HTML content
-            news = soup.find_all('div', class_='block news') # Find all news blocks
-            
-            if not news:
-                print("No news on the page. Ending scraping.") # Print message if no news is found
-                break
-            
-            for article in news:
-                
-                post = article.find('h3').find('a')['href'].strip() # Extract post URL
-                post_id = post.split('/')[2] # Extract post_id from URL
-                url = f"http://fapl.ru{post}" # Complete URL for the post
-
-                # Extract number of comments
-                post_comments = int(article.find('p', class_='f-r').text.split(' (')[1].replace(')', '').strip())
-                
-                while True:
-                    try:
-                        post_response = requests.get(url) # Send request to post URL
-                        break
-                    except Exception as e:
-                        print(f"Request failed: {e}") # Print error message if request fails
-                        sleep(2) # Wait for 2 seconds before retrying
-
-                post_response.encoding = post_response.apparent_encoding # Set the encoding for the response
-                post_soup = BeautifulSoup(post_response.text, 'html.parser') # Parse the HTML content
-                
-                post_header = post_soup.find('div', class_='block').find('h2').text.strip() # Extract post header
-                post_content = ' '.join(i.text.replace('\n\r\n', '').strip() for i in post_soup.find('div', class_='content').find_all('p')).strip() # Extract post content
-                post_tags = post_soup.find('div', class_='info').find('p', class_='tags').text.strip() # Extract post tags
-                post_visits = post_soup.find('p', class_='visits f-l').text.strip().split(': ')[1] # Extract post visits
-                post_time = datetime.strptime(post_soup.find('p', class_='date f-r').text.strip(), '%d.%m.%Y %H:%M') # Extract post time
-                
-                if self.mode == 'incremental' and post_id in self.data:
-                    flag = True
-                    break # Exit the loop if in incremental mode and the post_id already exists
-                elif self.mode == 'full' and post_time < datetime(2024, 1, 1):
-                    flag = True
-                    break # Exit the loop if in full mode and the post time is before 2024
-                
-                wrap = {'header': post_header,
-                        'content': post_content,
-                        'time': post_time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'post_visits': post_visits,
-                        'post_comments': post_comments,
-                        'post_tags': post_tags}
-                
-                result.setdefault(post_id, wrap) # Add the post details to the result dictionary
-
-            page += 20
-            
-            print(f"Moving to the next page: {page} records viewed.") # Print message indicating the next page
-            
-            if flag: break
-
-        return result
\ No newline at end of file
+
+                entries = []
+                for post, post_comments in news:
+
+                    post_id = post.split('/')[2] # Extract post_id from URL
+                    url = f"{self.base_url}{post}" # Complete URL for the post
+
+                    if self.mode == 'incremental' and post_id in self.known:
+                        flag = True
+                        break # Stop at the first known post; only the articles above it are new
+                    if self.checkpoint and post_id in self.checkpoint.post_ids:
+                        continue # Fetched before the crawl was interrupted
+
+                    entries.append((post_id, post_comments, executor.submit(self.fetch_article, url)))
+
+                try:
+                    for post_id, post_comments, future in entries:
+
+                        post_header, post_content, post_tags, post_visits, post_time = future.result() # Wait for the article in listing order
+
+                        if self.mode == 'full' and post_time < self.cutoff:
+                            flag = True
+                            break # Exit the loop if in full mode and the post is older than the cutoff
+
+                        wrap = {'header': post_header,
+                                'content': post_content,
+                                'time': post_time.strftime('%Y-%m-%d %H:%M:%S'),
+                                'post_visits': post_visits,
+                                'post_comments': post_comments,
+                                'post_tags': post_tags,
+                                'signature': minhash(post_content)} # Near-duplicate fingerprint, see dedup.py
+
+                        metrics.incr('articles_scraped')
+                        yield post_id, wrap
+                finally:
+                    for _, _, future in entries:
+                        future.cancel() # Drop article downloads that are no longer needed
+
+                page += 20
+
+                if self.checkpoint and not flag:
+                    self.checkpoint.mark_page(page, (post_id for post_id, _, _ in entries)) # The whole page has been yielded
+
+                print(f"Moving to the next page: {page} records viewed.") # Print message indicating the next page
+
+                if flag: break
+
+    def scraper(self):
+
+        """ Scrapes news articles from the specified URL and returns a dictionary with article details.
+        Returns:
+            dict: A dictionary where keys are post_ids and values are dictionaries of article details. """
+
+        result = {}
+        for post_id, wrap in self.iter_articles():
+            result.setdefault(post_id, wrap) # Add the post details to the result dictionary
+        return result
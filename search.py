@@ -0,0 +1,111 @@
+import re
+from metrics import metrics
+
+# Inflectional endings of Russian nouns and adjectives, longest first. Endings that are also
+# common word endings in names (-ах, -ал, -ил, ...) are left out: a too short stem matches unrelated words
+ENDINGS = sorted({
+    'иями', 'ями', 'ами', 'ией', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ов', 'ев', 'ей', 'ий', 'ой', 'ый',
+    'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ым', 'им', 'ом', 'ем', 'ую', 'юю', 'ых', 'их', 'ия', 'ию', 'ии',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+}, key=len, reverse=True)
+
+MIN_STEM = 3 # Shorter stems would match too many unrelated words
+MIN_TOKEN = 3 # innodb_ft_min_token_size: shorter words are not in the index
+CYRILLIC = re.compile(r'[а-яё]')
+
+
+def stem(word):
+
+    """ Reduces a word to a stem shared by its inflected forms by stripping one Russian ending,
+    e.g. 'Ливерпуля' and 'Ливерпуль' both become 'ливерпул'. Non-Cyrillic words are only lowercased.
+    Args:
+        word (str): A single word.
+    Returns:
+        str: The lowercased stem. """
+
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.search(word):
+        return word
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def boolean_query(text):
+
+    """ Turns free text into a MySQL boolean-mode full-text query requiring every word in any
+    inflected form: each word becomes a required prefix search on its stem.
+    Args:
+        text (str): The search text, e.g. 'Салаха Ливерпуль'.
+    Returns:
+        str: The boolean query, e.g. '+салах* +ливерпул*', or '' if no word is searchable. """
+
+    words = [word for word in re.findall(r'\w+', text) if len(word) >= MIN_TOKEN]
+    return ' '.join(f"+{stem(word)}*" for word in dict.fromkeys(words))
+
+
+class NewsSearch:
+
+    """ A class querying the full-text index over article headers and contents.
+    The index is an InnoDB FULLTEXT index created by ConnectToMySql.create_table (or
+    create_search_index for existing tables); InnoDB keeps it up to date as insert_data writes rows,
+    so new articles are searchable as soon as they are committed.
+    Attributes:
+        connection: An open DB-API connection to the MySQL server.
+        table_name (str): The news table searched. """
+
+    COLUMNS = ['post_id', 'header', 'time', 'post_visits', 'post_comments', 'post_tags']
+
+    def __init__(self, connection, table_name='news'):
+
+        """ Initializes the search.
+        Args:
+            connection: An open DB-API connection, e.g. ConnectToMySql.conn.
+            table_name (str): The news table searched. Defaults to 'news'. """
+
+        self.connection = connection
+        self.table_name = table_name
+
+    @metrics.timed('search')
+    def search(self, text, since=None, until=None, limit=50):
+
+        """ Finds the articles whose header or content mention every word of the text.
+        Args:
+            text (str): The search text, e.g. a player name.
+            since (datetime, optional): Only return articles published at or after this time.
+            until (datetime, optional): Only return articles published before this time.
+            limit (int): Maximum number of articles returned. Defaults to 50.
+        Returns:
+            list: Dictionaries of the COLUMNS plus the relevance 'score', best matches first
+            and newer articles first among equal scores. """
+
+        query = boolean_query(text)
+        if not query:
+            return []
+
+        where = ["MATCH(header, content) AGAINST (%s IN BOOLEAN MODE)"]
+        params = [query, query]
+        if since is not None:
+            where.append("time >= %s")
+            params.append(since)
+        if until is not None:
+            where.append("time < %s")
+            params.append(until)
+        params.append(limit)
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+            SELECT {', '.join(self.COLUMNS)}, MATCH(header, content) AGAINST (%s IN BOOLEAN MODE) AS score
+            FROM {self.table_name}
+            WHERE {' AND '.join(where)}
+            ORDER BY score DESC, time DESC
+            LIMIT %s;
+            """, params)
+            names = self.COLUMNS + ['score']
+            results = [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        metrics.incr('search_results', len(results))
+        return results
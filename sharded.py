@@ -0,0 +1,165 @@
+from math import ceil
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scraper import Scraper
+from http_client import HttpClient
+from storage import open_storage
+from pipeline import ScrapePipeline
+from metrics import metrics
+
+PAGE_SIZE = 20 # Articles per listing page, the step of the `?skip=` offset
+
+
+class ShardedCrawl:
+
+    """ A class running a full-mode crawl split into listing-page ranges across a process pool.
+    The listing range covering the date cutoff is found first by searching `?skip=` offsets;
+    every shard is then crawled and written to the database by its own process.
+    Attributes:
+        storage (str): Storage backend spec opened by every worker, see storage.open_storage.
+        cutoff (datetime): Oldest publication date collected.
+        processes (int): Number of worker processes.
+        rate (float): Request rate per second allowed for the whole crawl, shared by all workers. """
+
+    def __init__(self, storage=None, cutoff=None, processes=4, workers=4, rate=5.0, per_host=4,
+                 table_name='news', batch_size=200, shards_per_process=4, base_url='http://fapl.ru', overwrite=False):
+
+        """ Initializes the crawl.
+        Args:
+            storage (str, optional): Storage backend spec of a backend allowing concurrent writers,
+                e.g. 'mysql' or 'sqlite:fapl.db'. Defaults to the `storage` environment variable, or 'mysql'.
+            cutoff (datetime, optional): Oldest publication date collected. Defaults to 2024-01-01.
+            processes (int): Number of worker processes, at most `per_host`. Defaults to 4.
+            workers (int): Concurrent article downloads within each process. Defaults to 4.
+            rate (float): Requests per second allowed for the whole crawl. Defaults to 5.
+            per_host (int): Simultaneous requests allowed for the whole crawl; every process needs at least one. Defaults to 4.
+            table_name (str): Name of the table receiving the articles. Defaults to 'news'.
+            batch_size (int): Articles written and committed at once by each worker. Defaults to 200.
+            shards_per_process (int): Shards per process; smaller shards balance uneven pages. Defaults to 4.
+            base_url (str): Site root the news are scraped from. Defaults to 'http://fapl.ru'.
+            overwrite (bool): Replace all columns of articles already stored, see Storage.insert_data. Defaults to False. """
+
+        self.storage = storage
+        self.cutoff = cutoff or datetime(2024, 1, 1)
+        self.per_host = max(1, per_host)
+        if processes > self.per_host:
+            print(f"Only {self.per_host} simultaneous requests are allowed, crawling in {self.per_host} processes.")
+        # Every process holds at least one request slot, so more processes would exceed the global limit
+        self.processes = max(1, min(processes, self.per_host))
+        self.workers = workers
+        self.rate = rate
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.shards_per_process = shards_per_process
+        self.base_url = base_url
+        self.overwrite = overwrite
+
+    def _scraper(self, client, start_page=0, end_page=None):
+        return Scraper([], 'full', workers=self.workers, client=client, cutoff=self.cutoff,
+                       base_url=self.base_url, start_page=start_page, end_page=end_page)
+
+    def find_end_page(self):
+
+        """ Finds the listing offset the crawl can stop before: the one following the first page
+        that is empty or reaches past the cutoff. Pages are ordered newest first, so this property
+        is monotone in the offset: an exponential search finds an upper bound and a binary search
+        narrows it down, probing O(log n) pages instead of walking all of them.
+        Returns:
+            int: The exclusive end offset. """
+
+        client = HttpClient(per_host=self.per_host, rate=self.rate)
+        scraper = self._scraper(client)
+
+        def reaches_cutoff(index):
+            oldest = scraper.page_oldest_time(index * PAGE_SIZE)
+            return oldest is None or oldest < self.cutoff
+
+        low, high = 0, 1
+        while not reaches_cutoff(high):
+            low, high = high + 1, high * 2 # Every page up to `high` is newer than the cutoff
+        while low < high:
+            middle = (low + high) // 2
+            if reaches_cutoff(middle):
+                high = middle
+            else:
+                low = middle + 1
+
+        client.close()
+        return (low + 1) * PAGE_SIZE
+
+    def split(self, end_page, overlap=0.1):
+
+        """ Splits [0, end_page) into contiguous listing ranges.
+        Each shard also reads the first pages of the next one: articles published during the crawl
+        push older ones to higher offsets, and the overlap keeps them from falling between shards.
+        The overlap is a share of the shard size, rounded down to whole pages but at least one;
+        shards are made large enough for that page to stay within the share, so small crawls use
+        fewer shards instead of fetching most pages twice.
+        Args:
+            end_page (int): Exclusive end offset, see find_end_page.
+            overlap (float): Pages read past the end of a shard, as a share of its size. Defaults to 0.1.
+        Returns:
+            list: (start_page, end_page) offset pairs. """
+
+        pages = end_page // PAGE_SIZE
+        size = max(1, ceil(pages / (self.processes * self.shards_per_process)))
+        if overlap:
+            size = max(size, ceil(1 / overlap))
+        extra = max(1, int(size * overlap)) if overlap else 0
+        return [(start * PAGE_SIZE, min(pages, start + size + extra) * PAGE_SIZE)
+                for start in range(0, pages, size)]
+
+    def crawl_shard(self, start_page, end_page):
+
+        """ Crawls one listing range and writes it to the database. Runs in a worker process.
+        Returns:
+            tuple: (post_ids written, metrics summary of the worker). """
+
+        metrics.reset() # Forked workers inherit the counters of the parent
+        # The politeness limits hold for the whole crawl, so every worker gets its share;
+        # processes never exceed per_host, so the shares add up to at most the global limit
+        client = HttpClient(pool_size=self.workers + 1,
+                            per_host=self.per_host // self.processes,
+                            rate=self.rate / self.processes if self.rate else 0)
+        scraper = self._scraper(client, start_page, end_page)
+
+        db = open_storage(self.storage)
+        db.connect_to_database()
+        db.use_database()
+
+        post_ids = []
+
+        def tracked():
+            for post_id, wrap in scraper.iter_articles():
+                post_ids.append(post_id)
+                yield post_id, wrap
+
+        try:
+            ScrapePipeline(db, self.table_name, self.batch_size, overwrite=self.overwrite).run(tracked())
+        finally:
+            db.commit_and_close()
+            client.close()
+        return post_ids, metrics.summary()
+
+    def run(self):
+
+        """ Runs the whole crawl.
+        Returns:
+            set: post_ids of all articles written, de-duplicated across shards. """
+
+        end_page = self.find_end_page()
+        shards = self.split(end_page)
+        print(f"Crawling {end_page // PAGE_SIZE} listing pages in {len(shards)} shards on {self.processes} processes.")
+
+        post_ids = set()
+        fetched = 0
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            futures = [executor.submit(self.crawl_shard, start, end) for start, end in shards]
+            for future in as_completed(futures):
+                shard_ids, shard_metrics = future.result()
+                fetched += len(shard_ids)
+                post_ids.update(shard_ids) # Overlapping shards fetch some articles twice
+                metrics.merge(shard_metrics)
+
+        print(f"Sharded crawl finished: {len(post_ids)} articles ({fetched - len(post_ids)} duplicates merged).")
+        return post_ids
@@ -0,0 +1,421 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from metrics import metrics
+from tags import normalize_tags
+
+# Columns of the news table in the order of the rows built by Storage.rows
+NEWS_COLUMNS = ['post_id', 'header', 'content', 'time', 'post_visits', 'post_comments', 'post_tags', 'signature']
+
+
+class Storage:
+
+    """ Interface of the storage backends of the news table.
+    Backends implement the write path used by the scraper (table_exists, create_table, insert_data,
+    commit, rollback) and the reads used by the scheduler and the Analyzer (fetch_recent_post_ids,
+    fetch_hourly_activity, read_sql). Queries written against a backend use its `placeholder`.
+    Attributes:
+        name (str): Name of the backend, as used in storage specs.
+        placeholder (str): Parameter marker of the backend's SQL dialect.
+        concurrent_writers (bool): Whether several processes may write to the storage at once.
+        conn: The DB-API connection, once connected. """
+
+    name = None
+    placeholder = '?'
+    concurrent_writers = False
+
+    conn = None
+    cursor = None
+
+    def connect_to_database(self):
+        raise NotImplementedError
+
+    def use_database(self):
+
+        """ Selects the database to use. Embedded databases have only one. """
+
+    def table_exists(self, table_name):
+        raise NotImplementedError
+
+    def create_table(self, table_name):
+        raise NotImplementedError
+
+    def migrate(self, table_name):
+
+        """ Brings a table created by an older version up to date. Nothing to do by default. """
+
+    def prepare_table(self, table_name):
+
+        """ Creates the table if it does not exist, or else brings it up to date with migrate(),
+        so a table created by an older version gets the columns and indexes the writes expect. """
+
+        if not self.table_exists(table_name):
+            self.create_table(table_name)
+            print(f"Table '{table_name}' created.")
+        else:
+            print(f"Table '{table_name}' already exists.")
+            self.migrate(table_name) # One-off upgrades of tables created by older versions
+
+    def insert_data(self, table_name, data, batch_size=500, overwrite=False):
+        raise NotImplementedError
+
+    def fetch_recent_post_ids(self, table_name, limit=100):
+        raise NotImplementedError
+
+    def fetch_hourly_activity(self, table_name, days=28):
+        raise NotImplementedError
+
+    def commit(self):
+        raise NotImplementedError
+
+    def rollback(self):
+        raise NotImplementedError
+
+    def commit_and_close(self):
+        raise NotImplementedError
+
+    def read_sql(self, query, params=None, chunksize=None, **kwargs):
+
+        """ Runs a query into a pandas DataFrame.
+        Args:
+            query (str): The query, with parameters marked by `placeholder`.
+            params (list, optional): The query parameters.
+            chunksize (int, optional): Stream the result as an iterator of DataFrames of this many rows.
+            **kwargs: Further arguments of pandas.read_sql, e.g. index_col or parse_dates.
+        Returns:
+            DataFrame: The result, or an iterator of DataFrames if chunksize is given. """
+
+        import pandas as pd # Only the analysis needs pandas
+
+        return pd.read_sql(query, self.conn, params=params or None, chunksize=chunksize, **kwargs)
+
+    def tag_aggregates(self, table_name, since=None):
+
+        """ Aggregates articles, comments and visits per canonical tag inside the database.
+        Returns:
+            DataFrame: As Analyzer.tag_aggregates, or None if the backend leaves it to the Analyzer. """
+
+        return None
+
+    @staticmethod
+    def rows(data):
+
+        """ Converts scraped articles into row tuples ordered as NEWS_COLUMNS.
+        Args:
+            data (dict): A dictionary where keys are post_ids and values are dictionaries of article details.
+        Returns:
+            list: The row tuples. """
+
+        return [(post_id,
+                 fields['header'],
+                 fields['content'],
+                 fields['time'],
+                 int(fields['post_visits']),
+                 int(fields['post_comments']),
+                 fields['post_tags'],
+                 fields.get('signature'))
+                for post_id, fields in data.items()]
+
+
+class EmbeddedStorage(Storage):
+
+    """ Common part of the in-process SQL backends, which share the SQLite upsert dialect.
+    Attributes:
+        path (str): Location of the database file, or ':memory:'. """
+
+    def __init__(self, path):
+
+        """ Initializes the storage (not connected yet).
+        Args:
+            path (str): Location of the database file, or ':memory:'. """
+
+        self.path = path
+
+    def create_table(self, table_name):
+
+        """ Creates the news table if it does not exist. """
+
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            post_id VARCHAR NOT NULL PRIMARY KEY,
+            header TEXT,
+            content TEXT,
+            time TIMESTAMP,
+            post_visits INTEGER,
+            post_comments INTEGER,
+            post_tags TEXT,
+            signature BLOB
+        );
+        """)
+        print(f"Table '{table_name}' created successfully or already exists.")
+
+    def _upsert(self, table_name, overwrite=False):
+        if overwrite:
+            update = ',\n            '.join(f"{column} = excluded.{column}" for column in NEWS_COLUMNS[1:])
+        else:
+            update = f"""post_visits = excluded.post_visits,
+            post_comments = excluded.post_comments,
+            signature = COALESCE({table_name}.signature, excluded.signature)"""
+        return f"""
+        INSERT INTO {table_name} ({', '.join(NEWS_COLUMNS)})
+        VALUES ({', '.join(['?'] * len(NEWS_COLUMNS))})
+        ON CONFLICT (post_id) DO UPDATE SET
+            {update}
+        """
+
+    def _write_batch(self, table_name, batch, overwrite=False):
+        self.conn.executemany(self._upsert(table_name, overwrite), batch)
+
+    def insert_data(self, table_name, data, batch_size=500, overwrite=False):
+
+        """ Upserts articles in batches; they become durable on the next commit().
+        Rows whose post_id already exists get their post_visits and post_comments updated, and
+        with `overwrite` also their header, content, time, tags and signature. """
+
+        rows = self.rows(data)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            with metrics.timer('db_insert'):
+                self._write_batch(table_name, batch, overwrite)
+            metrics.incr('db_rows_written', len(batch))
+
+    def fetch_recent_post_ids(self, table_name, limit=100):
+
+        """ Returns the post_ids of the latest articles, newest first. """
+
+        query = f"SELECT post_id FROM {table_name} ORDER BY time DESC LIMIT ?"
+        return [row[0] for row in self.conn.execute(query, [limit]).fetchall()]
+
+    def _hour(self, column):
+        raise NotImplementedError
+
+    def fetch_hourly_activity(self, table_name, days=28):
+
+        """ Counts the articles published in every hour of the day over the last days.
+        Returns:
+            list: 24 article counts indexed by hour. """
+
+        hourly = [0] * 24
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        query = f"SELECT {self._hour('time')}, COUNT(*) FROM {table_name} WHERE time >= ? GROUP BY 1"
+        for hour, count in self.conn.execute(query, [since]).fetchall():
+            hourly[int(hour)] = count
+        return hourly
+
+    def commit(self):
+
+        """ Commits the pending batches. """
+
+        if self.conn:
+            with metrics.timer('db_commit'):
+                self.conn.commit()
+
+    def rollback(self):
+
+        """ Discards the batches written since the last commit. """
+
+        if self.conn:
+            self.conn.rollback()
+
+    def commit_and_close(self):
+
+        """ Commits the pending batches and closes the database. """
+
+        if self.conn:
+            self.commit()
+            self.conn.close()
+            self.conn = None
+
+
+class SqliteStorage(EmbeddedStorage):
+
+    """ A storage backend on an SQLite database file in WAL mode.
+    Readers never block the writer, and every batch of rows is written in one transaction.
+    Tags are indexed in {table}_tags, so tag aggregations do not parse post_tags. """
+
+    name = 'sqlite'
+    concurrent_writers = True # WAL and the busy timeout serialize the writers of several processes
+
+    def connect_to_database(self):
+
+        """ Opens the database file, creating it if needed. """
+
+        self.conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        if self.path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL") # WAL stays consistent; only the last commits may be lost on power loss
+        self.cursor = self.conn.cursor()
+
+    def table_exists(self, table_name):
+
+        """ Checks if a table exists in the database. """
+
+        query = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return self.conn.execute(query, [table_name]).fetchone()[0] > 0
+
+    def create_table(self, table_name):
+
+        """ Creates the news table, its time index and its tag index if they do not exist. """
+
+        super().create_table(table_name)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_time ON {table_name} (time)")
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_tags (
+            post_id VARCHAR NOT NULL,
+            tag VARCHAR NOT NULL,
+            PRIMARY KEY (post_id, tag)
+        );
+        """)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_tags_tag ON {table_name}_tags (tag)")
+
+    def _write_batch(self, table_name, batch, overwrite=False):
+        super()._write_batch(table_name, batch, overwrite)
+        post_ids = [row[0] for row in batch]
+        marks = ', '.join(['?'] * len(batch))
+        # Index the tags as stored: without overwrite the upsert keeps the post_tags of existing rows
+        stored = self.conn.execute(f"SELECT post_id, post_tags FROM {table_name} WHERE post_id IN ({marks})", post_ids).fetchall()
+        self.conn.execute(f"DELETE FROM {table_name}_tags WHERE post_id IN ({marks})", post_ids)
+        self.conn.executemany(f"INSERT OR IGNORE INTO {table_name}_tags (post_id, tag) VALUES (?, ?)",
+                              [(post_id, tag) for post_id, post_tags in stored for tag in normalize_tags(post_tags)])
+
+    def _hour(self, column):
+        return f"strftime('%H', {column})"
+
+    def read_sql(self, query, params=None, chunksize=None, **kwargs):
+
+        """ Runs a query into a pandas DataFrame, passing times as text the way they are stored. """
+
+        params = [value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+                  for value in params or []]
+        return super().read_sql(query, params, chunksize, **kwargs)
+
+    def tag_aggregates(self, table_name, since=None):
+
+        """ Aggregates the tags through the tag index. """
+
+        query = f"""
+        SELECT t.tag, COUNT(*) AS articles, SUM(n.post_comments) AS post_comments, SUM(n.post_visits) AS post_visits
+        FROM {table_name}_tags t JOIN {table_name} n ON n.post_id = t.post_id
+        {'WHERE n.time >= ?' if since is not None else ''}
+        GROUP BY t.tag
+        """
+        return self.read_sql(query, None if since is None else [since], index_col='tag')
+
+
+class DuckDbStorage(EmbeddedStorage):
+
+    """ A storage backend on a DuckDB database file. Analytic reads are columnar and vectorized,
+    and tags are split and aggregated inside the query instead of in pandas. A DuckDB file can be
+    opened for writing by a single process only. """
+
+    name = 'duckdb'
+
+    def connect_to_database(self):
+
+        """ Opens the database file, creating it if needed. """
+
+        import duckdb # Optional dependency
+
+        self.conn = duckdb.connect(self.path)
+        self.conn.begin() # DuckDB autocommits otherwise; batches are committed explicitly as on MySQL
+        self.cursor = self.conn
+
+    def commit(self):
+
+        """ Commits the pending batches and opens the next transaction. """
+
+        if self.conn:
+            with metrics.timer('db_commit'):
+                self.conn.commit()
+                self.conn.begin()
+
+    def rollback(self):
+
+        """ Discards the batches written since the last commit and opens the next transaction. """
+
+        if self.conn:
+            self.conn.rollback()
+            self.conn.begin()
+
+    def table_exists(self, table_name):
+
+        """ Checks if a table exists in the database. """
+
+        query = "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?"
+        return self.conn.execute(query, [table_name]).fetchone()[0] > 0
+
+    def _write_batch(self, table_name, batch, overwrite=False):
+        import pandas as pd
+
+        # One vectorized INSERT ... SELECT instead of a statement per row
+        frame = pd.DataFrame(batch, columns=NEWS_COLUMNS)
+        frame['time'] = pd.to_datetime(frame['time'])
+        self.conn.register('batch', frame)
+        try:
+            self.conn.execute(self._upsert(table_name, overwrite).replace(
+                f"VALUES ({', '.join(['?'] * len(NEWS_COLUMNS))})", "SELECT * FROM batch"))
+        finally:
+            self.conn.unregister('batch')
+
+    def _hour(self, column):
+        return f"hour({column})"
+
+    def read_sql(self, query, params=None, chunksize=None, index_col=None, parse_dates=None):
+
+        """ Runs a query into a pandas DataFrame through DuckDB's columnar result transfer. """
+
+        result = self.conn.execute(query, params or [])
+        if chunksize:
+            return (batch.to_pandas() for batch in result.fetch_record_batch(chunksize))
+        frame = result.df()
+        if parse_dates:
+            import pandas as pd
+
+            for column in parse_dates:
+                frame[column] = pd.to_datetime(frame[column])
+        return frame.set_index(index_col) if index_col else frame
+
+    def tag_aggregates(self, table_name, since=None):
+
+        """ Splits post_tags and aggregates the canonical tags in one vectorized query.
+        Tags are normalized as tags.normalize_tags does: NFC, collapsed whitespace, once per article. """
+
+        query = f"""
+        SELECT tag, COUNT(*) AS articles, SUM(post_comments)::BIGINT AS post_comments, SUM(post_visits)::BIGINT AS post_visits
+        FROM (
+            SELECT DISTINCT post_id, post_comments, post_visits,
+                   trim(regexp_replace(nfc_normalize(raw_tag), '[\\s\\p{{Z}}]+', ' ', 'g')) AS tag
+            FROM (SELECT post_id, post_comments, post_visits, unnest(string_split(post_tags, ',')) AS raw_tag
+                  FROM {table_name}
+                  {'WHERE time >= ?' if since is not None else ''})
+        )
+        WHERE tag <> ''
+        GROUP BY tag
+        """
+        return self.read_sql(query, None if since is None else [since], index_col='tag')
+
+
+def open_storage(spec=None):
+
+    """ Creates the storage backend selected by a spec: 'mysql' (the server configured by the host,
+    user, password and database environment variables), 'sqlite:<path>' or 'duckdb:<path>'.
+    Args:
+        spec (str, optional): The backend spec. Defaults to the `storage` environment variable, or 'mysql'.
+    Returns:
+        Storage: The backend, not connected yet.
+    Raises:
+        ValueError: If the spec names an unknown backend. """
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    spec = spec or os.getenv('storage') or 'mysql'
+    backend, _, path = spec.partition(':')
+    if backend == 'mysql':
+        from my_sql_db import ConnectToMySql # The MySQL driver is only needed for this backend
+        return ConnectToMySql.from_env()
+    if backend == 'sqlite':
+        return SqliteStorage(path or 'fapl.db')
+    if backend == 'duckdb':
+        return DuckDbStorage(path or 'fapl.duckdb')
+    raise ValueError(f"Unknown storage backend '{backend}'.")
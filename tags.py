@@ -0,0 +1,19 @@
+import unicodedata
+
+
+def normalize_tags(raw):
+
+    """ Splits a comma-joined post_tags string into canonical tags.
+    Tags are NFC-normalized, stripped, have inner whitespace collapsed to single spaces,
+    and are de-duplicated keeping their original order; empty tags are dropped.
+    Args:
+        raw (str): The post_tags value, e.g. 'Арсенал, Челси'.
+    Returns:
+        list: The canonical tags, e.g. ['Арсенал', 'Челси']. """
+
+    tags = []
+    for tag in (raw or '').split(','):
+        tag = ' '.join(unicodedata.normalize('NFC', tag).split())
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
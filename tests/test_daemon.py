@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import FixtureServer
+from daemon import NewsDaemon
+from http_client import HttpClient
+from storage import SqliteStorage
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer(articles=10).start()
+    yield server
+    server.stop()
+
+
+def open_db(path):
+    db = SqliteStorage(path)
+    db.connect_to_database()
+    db.prepare_table('news')
+    return db
+
+
+def count(db, table):
+    return db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_failed_poll_leaves_no_rows(server, tmp_path, monkeypatch):
+    path = str(tmp_path / 'fapl.db')
+    db = open_db(path)
+    daemon = NewsDaemon(db, client=HttpClient(rate=0), workers=2, base_url=server.url)
+
+    def failing_write(table_name, batch, overwrite=False):
+        SqliteStorage._write_batch(db, table_name, batch, overwrite)
+        raise RuntimeError('write failed after the upsert')
+
+    monkeypatch.setattr(db, '_write_batch', failing_write)
+    assert daemon.safe_poll() == 0
+    assert not db.conn.in_transaction
+
+    db.commit_and_close() # As on shutdown: nothing of the failed poll may be committed
+    daemon.client.close()
+    db = open_db(path)
+    assert count(db, 'news') == 0
+    assert count(db, 'news_tags') == 0
+    db.commit_and_close()
+
+
+def test_poll_after_failure_stores_articles(server, tmp_path, monkeypatch):
+    db = open_db(str(tmp_path / 'fapl.db'))
+    daemon = NewsDaemon(db, client=HttpClient(rate=0), workers=2, base_url=server.url)
+
+    def failing_write(table_name, batch, overwrite=False):
+        raise RuntimeError('write failed')
+
+    monkeypatch.setattr(db, '_write_batch', failing_write)
+    assert daemon.safe_poll() == 0
+    monkeypatch.undo()
+
+    assert daemon.safe_poll() == 10 # Nothing was marked as known by the failed poll
+    assert count(db, 'news') == 10
+    assert count(db, 'news_tags') > 0
+    db.commit_and_close()
+    daemon.client.close()
@@ -0,0 +1,51 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import PARSERS, SoupParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+
+    """ Reads a saved page, decoded as the scraper decodes fapl.ru responses. """
+
+    with open(os.path.join(FIXTURES, name), 'rb') as file:
+        return file.read().decode('windows-1251')
+
+
+def backend(name):
+    try:
+        return PARSERS[name]()
+    except ImportError:
+        pytest.skip(f"Parser '{name}' is not installed.")
+
+
+@pytest.mark.parametrize('name', sorted(PARSERS))
+def test_listing_matches_bs4(name):
+    html = load_fixture('listing.html')
+    assert backend(name).parse_listing(html) == SoupParser().parse_listing(html)
+
+
+@pytest.mark.parametrize('name', sorted(PARSERS))
+def test_article_matches_bs4(name):
+    html = load_fixture('article.html')
+    assert backend(name).parse_article(html) == SoupParser().parse_article(html)
+
+
+def test_bs4_reference():
+    # Pins the reference output itself, so parity cannot hold by all backends changing together
+    assert SoupParser().parse_listing(load_fixture('listing.html')) == [
+        ('/news/140512/', 37), ('/news/140511/', 0), ('/news/140510/', 112)]
+
+    header, content, tags, visits, time = SoupParser().parse_article(load_fixture('article.html'))
+    assert header == '«Арсенал» обыграл «Челси»\r\n в лондонском дерби'
+    assert '«Челси». Первый тайм прошёл без голов,\r\nа после' in content # '\r\n' inside a paragraph is kept
+    assert 'с разрывом\n\nстроки' in content # So is '\n\n', only the '\n\r\n' separators are dropped
+    assert 'Одиночный\rвозврат' in content
+    assert tags == 'Арсенал, Челси,  Премьер-лига'
+    assert visits == '4821'
+    assert time.strftime('%d.%m.%Y %H:%M') == '12.05.2024 21:15'